@@ -1,8 +1,35 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from app.backend.config import settings
+from app.backend.middleware.compression import CompressionMiddleware
+from app.backend.middleware.metrics import MetricsMiddleware
+from app.backend.middleware.server_timing import ServerTimingMiddleware
+from app.backend.services.config_service import SERVER_CONFIG_FILE, apply_server_config, config_file, config_watcher
+from app.backend.services.logging_service import configure_worker_logging
+from app.backend.services.signature_service import VMS_KEYS_FILE, reload_vms_credentials
+from app.backend.services.site_service import SITES_FILE, close_artemis_clients, get_sites, reload_sites
+from app.backend.services.upstream_limiter import UpstreamBusyError
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Runs once per worker process: per-process logging, then each site's connection
+    # pool is created inside this worker's own event loop
+    configure_worker_logging()
+    get_sites()
+    # Pick up key / site / log level changes from the manager UI without a restart
+    config_watcher.watch(config_file(VMS_KEYS_FILE), reload_vms_credentials)
+    config_watcher.watch(config_file(SITES_FILE), reload_sites)
+    config_watcher.watch(config_file(SERVER_CONFIG_FILE), apply_server_config)
+    config_watcher.start()
+    yield
+    await config_watcher.stop()
+    # Release the pooled VMS connections on shutdown
+    await close_artemis_clients()
 
 # 1. Create App
-app = FastAPI(title="VMS Controller")
+app = FastAPI(title="VMS Controller", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -11,9 +38,30 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# The upstream limiter refused a VMS call: tell the client when to come back
+@app.exception_handler(UpstreamBusyError)
+async def upstream_busy_handler(request: Request, exc: UpstreamBusyError):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+# gzip/brotli for large list responses (negotiated via Accept-Encoding)
+app.add_middleware(CompressionMiddleware)
+
+# Per-phase timing for the proxied VMS routes (debugging slow kiosks)
+if settings.SERVER_TIMING_ENABLED:
+    app.add_middleware(ServerTimingMiddleware, prefixes=("/api/doors", "/api/visitors", "/api/register"))
+
+# Outermost, so latency includes compression and every other middleware
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 # 2. Include Routers
 try:
     # Import the 'router' variable from your controller files
+    from app.backend.controllers.admin_controller import router as admin_router
     from app.backend.controllers.auth_controller import router as auth_router
     from app.backend.controllers.doorlist_controller import router as door_router
     from app.backend.controllers.visitorlist_controller import router as visitor_router
@@ -24,6 +72,11 @@ try:
     app.include_router(door_router, prefix="/api/doors", tags=["Doors"])
     app.include_router(visitor_router, prefix="/api/visitors", tags=["Visitors"])
     app.include_router(register_router, prefix="/api/register", tags=["Registration"])
+    app.include_router(admin_router, prefix="/api/admin", tags=["Admin"])
+
+    if settings.METRICS_ENABLED:
+        from app.backend.controllers.metrics_controller import router as metrics_router
+        app.include_router(metrics_router, tags=["Metrics"])
     
     print("SUCCESS: All routers connected.")
 except ImportError as e:
@@ -2,18 +2,120 @@ import os
 
 class Settings:
     # --- VMS / ARTEMIS CONFIGURATION ---
-    # Replace this with your actual VMS Host IP/URL
-    ARTEMIS_HOST = "https://192.168.1.100:443" 
+    # Replace this with your actual VMS Host IP/URL (or set ARTEMIS_HOST, e.g. to point at benchmarks/artemis_stub.py)
+    ARTEMIS_HOST = os.getenv("ARTEMIS_HOST", "https://192.168.1.100:443")
     
     # These are placeholders; your signature_service loads the real ones from JSON
     APP_KEY = ""
     APP_SECRET = ""
 
+    # --- ARTEMIS CONNECTION POOL ---
+    # One keep-alive pool is shared by every controller, so the TLS handshake
+    # to the VMS box is paid once per connection instead of once per request.
+    ARTEMIS_POOL_CONNECTIONS = int(os.getenv("ARTEMIS_POOL_CONNECTIONS", "4"))  # Number of hosts to keep pools for
+    ARTEMIS_POOL_MAXSIZE = int(os.getenv("ARTEMIS_POOL_MAXSIZE", "20"))  # Max open connections per host
+    ARTEMIS_POOL_BLOCK = os.getenv("ARTEMIS_POOL_BLOCK", "1") == "1"  # Wait for a free connection instead of opening extras
+    ARTEMIS_VERIFY_SSL = os.getenv("ARTEMIS_VERIFY_SSL", "0") == "1"  # The VMS box uses a self-signed certificate
+    ARTEMIS_KEEPALIVE_EXPIRY = float(os.getenv("ARTEMIS_KEEPALIVE_EXPIRY", "30"))  # Seconds an idle connection is kept
+
+    # Non-blocking (httpx) client by default. Set ARTEMIS_ASYNC=0 to fall back to the
+    # blocking requests session, which then runs in the anyio worker thread pool.
+    ARTEMIS_ASYNC = os.getenv("ARTEMIS_ASYNC", "1") == "1"
+
+    # --- UPSTREAM TIMEOUTS / RETRIES ---
+    # Without timeouts a hung VMS socket holds a request (and a pool slot) forever
+    ARTEMIS_CONNECT_TIMEOUT = float(os.getenv("ARTEMIS_CONNECT_TIMEOUT", "5"))  # Seconds to open a connection
+    ARTEMIS_READ_TIMEOUT = float(os.getenv("ARTEMIS_READ_TIMEOUT", "20"))  # Seconds to wait for response data
+    ARTEMIS_REQUEST_DEADLINE = float(os.getenv("ARTEMIS_REQUEST_DEADLINE", "30"))  # Total seconds per VMS call incl. retries (0 = none)
+    # Reads only (door list, visitor list); appointment registration is never retried
+    ARTEMIS_RETRIES = int(os.getenv("ARTEMIS_RETRIES", "2"))  # Extra attempts after the first
+    ARTEMIS_RETRY_BACKOFF = float(os.getenv("ARTEMIS_RETRY_BACKOFF", "0.2"))  # Base backoff seconds, doubled per attempt
+    ARTEMIS_RETRY_MAX_BACKOFF = float(os.getenv("ARTEMIS_RETRY_MAX_BACKOFF", "2"))  # Backoff cap; actual sleep is random up to it
+
+    # --- MULTI-SITE (sites are defined in artemis_sites.json next to the EXE) ---
+    SITE_FANOUT_TIMEOUT = float(os.getenv("SITE_FANOUT_TIMEOUT", "10"))  # Seconds ?site=all waits before reporting a site as timed out (0 = wait for all)
+
+    # --- UPSTREAM LIMITER (admission control toward the VMS) ---
+    # Calls over these limits wait up to ARTEMIS_QUEUE_TIMEOUT, then get 503 + Retry-After.
+    ARTEMIS_MAX_IN_FLIGHT = int(os.getenv("ARTEMIS_MAX_IN_FLIGHT", "20"))  # Concurrent Artemis calls per worker (0 = unlimited)
+    ARTEMIS_RATE_LIMIT = float(os.getenv("ARTEMIS_RATE_LIMIT", "0"))  # Artemis calls/sec per worker (0 = unlimited)
+    ARTEMIS_RATE_BURST = int(os.getenv("ARTEMIS_RATE_BURST", "20"))  # Calls allowed at once before the rate applies
+    ARTEMIS_QUEUE_TIMEOUT = float(os.getenv("ARTEMIS_QUEUE_TIMEOUT", "2"))  # Seconds a call may wait for admission
+    # Per-endpoint quotas on top of the global ones: "short_path=max_in_flight:rate,..."
+    # e.g. "/api/visitor/v1/appointment=4:10" (either number may be empty)
+    ARTEMIS_ENDPOINT_LIMITS = os.getenv("ARTEMIS_ENDPOINT_LIMITS", "")
+
+    # Concurrent identical read calls (same path + canonical body) share one upstream request
+    ARTEMIS_COALESCE = os.getenv("ARTEMIS_COALESCE", "1") == "1"
+
+    # Request body serializer. The same bytes are hashed for Content-MD5 and sent.
+    #   "compact"  - json.dumps with no whitespace (default)
+    #   "standard" - json.dumps defaults, byte-identical to the old behaviour
+    #   "orjson"   - fastest; falls back to "compact" if orjson is not installed
+    ARTEMIS_JSON_SERIALIZER = os.getenv("ARTEMIS_JSON_SERIALIZER", "compact")
+
+    # Forward raw Artemis response bytes instead of parse + re-encode (only "code" is inspected)
+    VMS_PASSTHROUGH = os.getenv("VMS_PASSTHROUGH", "1") == "1"
+
+    # Memoized Content-MD5 / signatures for small repeated bodies (bounded LRU)
+    SIGNATURE_CACHE_SIZE = int(os.getenv("SIGNATURE_CACHE_SIZE", "256"))  # Entries per cache
+    SIGNATURE_CACHE_MAX_BODY = int(os.getenv("SIGNATURE_CACHE_MAX_BODY", "4096"))  # Larger bodies are never cached
+
+    # --- ENDPOINT VARIANT DISCOVERY ---
+    # Older Artemis versions lack some API variants; remember which one works per host
+    ENDPOINT_BREAKER_THRESHOLD = int(os.getenv("ENDPOINT_BREAKER_THRESHOLD", "3"))  # Consecutive "API missing" answers before a variant is skipped
+    # VMS result codes meaning "this API doesn't exist here" (HTTP 404/405 always count)
+    ENDPOINT_MISSING_CODES = os.getenv("ENDPOINT_MISSING_CODES", "404,405")
+    ENDPOINT_BREAKER_COOLDOWN = float(os.getenv("ENDPOINT_BREAKER_COOLDOWN", "300"))  # Seconds a failing variant is skipped
+    ENDPOINT_REPROBE_INTERVAL = float(os.getenv("ENDPOINT_REPROBE_INTERVAL", "3600"))  # Seconds between re-probes of better variants
+
+    # --- DOOR LIST PAGINATION ---
+    DOOR_PAGE_SIZE = int(os.getenv("DOOR_PAGE_SIZE", "200"))  # Doors per Artemis page request
+    DOOR_PAGE_CONCURRENCY = int(os.getenv("DOOR_PAGE_CONCURRENCY", "4"))  # Max pages fetched in parallel after page 1
+
+    # --- DOOR LIST CACHE ---
+    # Door inventory rarely changes; serve it from memory and refresh in the background
+    DOOR_CACHE_TTL = float(os.getenv("DOOR_CACHE_TTL", "60"))  # Seconds a list is fresh (0 disables the cache)
+    DOOR_CACHE_STALE_TTL = float(os.getenv("DOOR_CACHE_STALE_TTL", "300"))  # Extra seconds a stale list is served while refreshing
+
+    # --- VISITOR LIST CACHE ---
+    # Cleared whenever a visitor registration succeeds
+    VISITOR_CACHE_TTL = float(os.getenv("VISITOR_CACHE_TTL", "5"))  # Seconds a cached query result is served (0 disables the cache)
+    VISITOR_CACHE_MAX_ENTRIES = int(os.getenv("VISITOR_CACHE_MAX_ENTRIES", "256"))  # Distinct queries kept
+    VISITOR_CACHE_MAX_BYTES = int(os.getenv("VISITOR_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))  # Total upstream bytes kept
+
+    # --- VISITOR EXPORT ---
+    VISITOR_EXPORT_PAGE_SIZE = int(os.getenv("VISITOR_EXPORT_PAGE_SIZE", "500"))  # Visitors per Artemis page while streaming an export
+
+    # --- BULK VISITOR REGISTRATION ---
+    BULK_REGISTER_CONCURRENCY = int(os.getenv("BULK_REGISTER_CONCURRENCY", "8"))  # Appointments submitted to the VMS in parallel
+    BULK_REGISTER_MAX_ITEMS = int(os.getenv("BULK_REGISTER_MAX_ITEMS", "1000"))  # Largest accepted batch
+
+    # --- RESPONSE COMPRESSION ---
+    # gzip always; brotli ("br") too when the optional brotli package is installed
+    COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "1") == "1"
+    COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))  # Smaller bodies are sent uncompressed
+    COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+    COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "5"))
+
+    # --- CONDITIONAL REQUESTS ---
+    # Door/visitor lists carry a strong ETag; a matching If-None-Match gets 304 Not Modified
+    ETAG_ENABLED = os.getenv("ETAG_ENABLED", "1") == "1"
+
+    # --- CONFIG HOT RELOAD ---
+    # vms_keys.json and server_config.json are re-read when their mtime changes
+    CONFIG_WATCH_INTERVAL = float(os.getenv("CONFIG_WATCH_INTERVAL", "2"))  # Seconds between checks (0 disables)
+
+    # --- METRICS ---
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"  # Prometheus text format at GET /metrics
+    SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "1") == "1"  # Per-phase Server-Timing header; set 0 in production
+
     # --- SECURITY / JWT CONFIGURATION ---
     # Change this secret key for production!
     JWT_SECRET_KEY = "super_secret_key_change_me_in_production"
     JWT_ALGORITHM = "HS256"
     JWT_TOKEN_EXPIRE_MINUTES = 30
+    TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "1024"))  # Verified tokens kept in memory (0 disables the cache)
 
 settings = Settings()
 
@@ -0,0 +1,68 @@
+# backend/controllers/admin_controller.py
+
+import logging
+import os
+from typing import Annotated
+from fastapi import APIRouter, Depends, HTTPException, status
+from pydantic import BaseModel
+from app.backend.services.auth_service import get_current_user, User
+from app.backend.config import settings
+from app.backend.services.config_service import SERVER_CONFIG_FILE, config_file, config_watcher, update_json_file
+from app.backend.services.logging_service import LEVELS, get_log_level, is_worker_process, set_log_level
+
+router = APIRouter(tags=["Admin"])
+
+
+class LogLevelRequest(BaseModel):
+    level: str
+
+
+@router.get("/log-level")
+async def read_log_level(current_user: Annotated[User, Depends(get_current_user)]):
+    return {"status": 200, "level": get_log_level(), "levels": list(LEVELS)}
+
+
+@router.put("/log-level")
+async def change_log_level(request_body: LogLevelRequest, current_user: Annotated[User, Depends(get_current_user)]):
+    """Changes the service log level live, without a restart.
+
+    Applied to this process at once and saved as log_level in server_config.json,
+    which every other worker's config watcher applies within CONFIG_WATCH_INTERVAL
+    (and the next start uses). "scope" in the response says how far it reached.
+    """
+    try:
+        level = set_log_level(request_body.level)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    try:
+        update_json_file(config_file(SERVER_CONFIG_FILE), log_level=level)
+        saved = True
+    except (OSError, ValueError) as e:
+        saved = False
+        logging.warning(f"Could not save log_level to {SERVER_CONFIG_FILE} ({e}); the change is not persisted")
+
+    logging.warning(f"Log level changed to {level} by {current_user.username}")
+    return {"status": 200, "level": level, "saved": saved, **_reach(propagated=saved)}
+
+
+@router.post("/config/reload")
+async def reload_config(current_user: Annotated[User, Depends(get_current_user)]):
+    """Re-checks the watched config files now instead of waiting for the next poll.
+
+    Only the worker that handled the request checks; in multi-worker mode the
+    others pick the same changes up on their own next poll.
+    """
+    reloaded = config_watcher.check()
+    return {"status": 200, "reloaded": reloaded, "total_reloads": config_watcher.reloads, **_reach(propagated=True)}
+
+
+def _reach(propagated):
+    """Which processes a change applies to: "process" when there is only one, else
+    "all_workers" (the rest follow within other_workers_within_seconds) or "this_worker"."""
+    if not is_worker_process():
+        return {"scope": "process"}
+    if propagated and settings.CONFIG_WATCH_INTERVAL > 0:
+        return {"scope": "all_workers", "worker_pid": os.getpid(),
+                "other_workers_within_seconds": settings.CONFIG_WATCH_INTERVAL}
+    return {"scope": "this_worker", "worker_pid": os.getpid()}
@@ -1,9 +1,20 @@
 # backend/controllers/doorlist_controller.py (FINAL WORKING CODE)
 
-from fastapi import APIRouter, Depends, HTTPException, status
-import requests
-from app.backend.services.signature_service import SignatureService
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from app.backend.config import settings
+from app.backend.services.artemis_client import ArtemisConnectionError
 from app.backend.services.auth_service import get_current_user, User # <-- JWT Imports
+from app.backend.services.door_cache import DoorListCache
+from app.backend.services.endpoint_selector import EndpointSelector
+from app.backend.services.metrics_service import cache_collector, register_collector
+from app.backend.services.response_service import (
+    FastJSONResponse, cached_body_response, parse_vms_json, render_cached_body
+)
+from app.backend.services.site_service import (
+    fan_out, get_site, get_sites, on_sites_changed, raise_all_failed, site_status, wants_fan_out
+)
+from app.backend.services.upstream_limiter import UpstreamBusyError
 from typing import Annotated 
 
 router = APIRouter(prefix="/door", tags=["Linked Doors"])
@@ -15,64 +26,224 @@ ENDPOINTS = [
     "/api/resource/v1/acsDoor/acsDoorList"
 ]
 
-@router.post("/linked")
-# JWT PROTECTION RESTORED
-def linked_door_list(current_user: Annotated[User, Depends(get_current_user)]):
-    payload = {
-        "pageNo": 1,
-        "pageSize": 200
+# Remembers which of the ENDPOINTS works on each host so the dead one isn't retried every call
+endpoint_selector = EndpointSelector(ENDPOINTS)
+
+# Answers that mean the variant isn't implemented on this host. Only these open its
+# breaker; timeouts, 5xx and the like say nothing about which variant the VMS supports.
+MISSING_API_STATUS = (404, 405)
+MISSING_API_CODES = {code.strip() for code in settings.ENDPOINT_MISSING_CODES.split(",") if code.strip()}
+
+def _page_payload(page_no):
+    return {
+        "pageNo": page_no,
+        "pageSize": settings.DOOR_PAGE_SIZE
     }
 
-    ok_res = None
-    last_error = None
 
-    # Try both APIs until one returns proper data
-    for ep_short in ENDPOINTS:
-        # CRITICAL FIX: Build the full path required for the VMS signature protocol
-        ep_full_signature = "/artemis" + ep_short 
+async def _fetch_page(client, ep_short, page_no, semaphore):
+    """Fetches one extra page from an endpoint already known to work."""
+    async with semaphore:
+        try:
+            response = await client.post(ep_short, _page_payload(page_no), idempotent=True)
+        except UpstreamBusyError:
+            # Our own limiter said no: not a failure of this endpoint, surface the 503
+            raise
+        except Exception as e:
+            last_error = str(e)
+        else:
+            if str(response.status_code) == "200":
+                data = parse_vms_json(response.content)
+                if str(data.get("code")) == "0":
+                    return data.get("data", {}).get("list", [])
+                last_error = f"VMS code {data.get('code')}: {data.get('msg')}"
+            else:
+                last_error = f"HTTP {response.status_code}: {response.text[:100]}"
+
+    raise HTTPException(
+        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        detail=f"VMS API Request Failed on door list page {page_no}. VMS Error: {last_error}"
+    )
 
-        signature = SignatureService.generate_signature(
-            "POST",
-            ep_full_signature, # <-- Use the FULL path for signature calculation
-            payload
-        )
 
-        headers = {
-            "Accept": "application/json",
-            "Content-Type": "application/json;charset=UTF-8",
-            "Content-MD5": signature["Content-MD5"],
-            "X-Ca-Key": signature["X-Ca-Key"],
-            "X-Ca-Signature": signature["X-Ca-Signature"],
-            "X-Ca-Signature-Headers": signature["X-Ca-Signature-Headers"]
-        }
+async def fetch_linked_doors(client):
+    """Fetches the full door list from one site's VMS, trying each endpoint variant in order."""
+    payload = _page_payload(1)
 
+    ok_res = None
+    ok_endpoint = None
+    last_error = None
+    # Set when a better variant failed for a reason other than being missing
+    transient_failure = False
+
+    # Try the known-good API first, then any variant whose breaker is closed
+    for ep_short in endpoint_selector.candidates(client.host):
+        missing = False
         try:
-            # Use the SHORT path (ep_short) for execution URL construction (Host + Short Path)
-            response = requests.post(
-                signature["Host"] + ep_short, 
-                headers=headers,
-                json=payload,
-                verify=False
-            )
+            # The shared client signs the FULL path (/artemis + short) and posts to Host + short path
+            response = await client.post(ep_short, payload, idempotent=True)
 
             # Check if the API succeeded (Status 200 and VMS code 0)
             if str(response.status_code) == "200":
-                data = response.json()
+                data = parse_vms_json(response.content)
                 if str(data.get("code")) == "0":
                     ok_res = data
+                    ok_endpoint = ep_short
+                    # A fallback that only won because a better variant hiccuped doesn't replace it
+                    if not transient_failure:
+                        endpoint_selector.record_success(client.host, ep_short)
                     break # Success, exit the loop
+                missing = str(data.get("code")) in MISSING_API_CODES
+                last_error = f"VMS code {data.get('code')}: {data.get('msg')}"
             else:
+                missing = response.status_code in MISSING_API_STATUS
                 last_error = f"HTTP {response.status_code}: {response.text[:100]}"
+        except UpstreamBusyError:
+            # Our own limiter said no: not a failure of this endpoint, surface the 503
+            raise
+        except ArtemisConnectionError as e:
+            # The host itself is unreachable; another variant won't do better
+            last_error = str(e)
+            break
         except Exception as e:
             last_error = str(e)
 
+        if missing:
+            endpoint_selector.record_failure(client.host, ep_short)
+        else:
+            transient_failure = True
+
     if not ok_res:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, 
             detail=f"VMS API Request Failed. VMS Error: {last_error or 'Unknown VMS Error'}"
         )
 
-    return {
+    first_page = ok_res.get("data", {})
+    doors = first_page.get("list", [])
+
+    # Page 1 tells us the total; fetch the rest concurrently (bounded) and merge in page order
+    total = int(first_page.get("total") or 0)
+    page_count = -(-total // settings.DOOR_PAGE_SIZE)
+    if page_count > 1:
+        semaphore = asyncio.Semaphore(settings.DOOR_PAGE_CONCURRENCY)
+        pages = await asyncio.gather(*(
+            _fetch_page(client, ok_endpoint, page_no, semaphore) for page_no in range(2, page_count + 1)
+        ))
+        for page in pages:
+            doors.extend(page)
+
+    return doors
+
+
+class SiteDoorList:
+    """One site's doors, kept as records (for fan-out merging) and as the rendered single-site response."""
+
+    def __init__(self, site, doors):
+        self.site = site
+        self.doors = doors
+        # Rendered once, so cache hits skip serialization and compression
+        self.body = render_cached_body({
+            "status": 200,
+            "doors": doors
+        })
+
+
+# Kiosks poll this constantly; serve it from memory and refresh in the background (one cache per site)
+door_caches = {}
+
+
+def get_door_cache(site_name):
+    cache = door_caches.get(site_name)
+    if cache is None:
+        async def load_site_doors():
+            # Looked up per load so a reloaded sites file (new host) takes effect
+            return SiteDoorList(site_name, await fetch_linked_doors(get_site(site_name).client))
+
+        cache = door_caches[site_name] = DoorListCache(load_site_doors)
+    return cache
+
+
+def _collect_door_caches():
+    samples = []
+    for name, cache in list(door_caches.items()):
+        samples.extend(cache_collector("door_list", cache.stats, {"site": name})())
+    return samples
+
+
+register_collector(_collect_door_caches)
+
+
+# Site names -> (per-site SiteDoorList objects, merged body), reused until any site refreshes
+_merged_bodies = {}
+
+
+def _drop_site_caches(changed, removed):
+    """Sites reload: a changed host or keys may be another platform; removed sites go entirely."""
+    for name in changed:
+        cache = door_caches.get(name)
+        if cache is not None:
+            cache.invalidate()
+    for name in removed:
+        door_caches.pop(name, None)
+    for names in [names for names in _merged_bodies if set(names) & set(removed)]:
+        _merged_bodies.pop(names, None)
+
+
+on_sites_changed(_drop_site_caches)
+
+
+def _merged_door_body(results):
+    """Renders the fan-out response: every site's doors tagged with "site", plus a per-site status."""
+    names = tuple(results)
+    lists = tuple(value for state, value in results.values() if state == "ok")
+    complete = len(lists) == len(names)
+    if complete:
+        memo = _merged_bodies.get(names)
+        if memo is not None and all(a is b for a, b in zip(memo[0], lists)):
+            return memo[1]
+
+    body = render_cached_body({
         "status": 200,
-        "doors": ok_res.get("data", {}).get("list", [])
-    }
\ No newline at end of file
+        "doors": [dict(door, site=site_doors.site) for site_doors in lists for door in site_doors.doors],
+        "sites": site_status(results),
+        "partial": not complete
+    })
+    if complete:
+        _merged_bodies[names] = (lists, body)
+    return body
+
+
+@router.post("/linked", response_class=FastJSONResponse)
+# JWT PROTECTION RESTORED
+async def linked_door_list(request: Request, current_user: Annotated[User, Depends(get_current_user)], site: str | None = None):
+    """Door list of one site (?site=name, the default site if omitted), or of several merged
+    (?site=all or ?site=a,b) with each door tagged by site. A site slower than
+    SITE_FANOUT_TIMEOUT is reported as "timeout" and the other sites are still returned."""
+    sites = get_sites().select(site)
+    if not wants_fan_out(site):
+        site_doors = await get_door_cache(sites[0].name).get()
+        return cached_body_response(request, site_doors.body)
+
+    results = await fan_out(sites, lambda s: get_door_cache(s.name).get())
+    if not any(state == "ok" for state, _ in results.values()):
+        raise_all_failed(results)
+    return cached_body_response(request, _merged_door_body(results))
+
+
+@router.post("/cache/invalidate")
+async def invalidate_door_cache(current_user: Annotated[User, Depends(get_current_user)], site: str | None = None):
+    """Drops the cached door list (of one site, or of every site if none is given) so the next request reloads it."""
+    names = [s.name for s in get_sites().select(site)] if site else list(door_caches)
+    for name in names:
+        get_door_cache(name).invalidate()
+    return {"status": 200, "detail": "Door list cache invalidated", "sites": names}
+
+
+@router.get("/cache/stats")
+async def door_cache_stats(current_user: Annotated[User, Depends(get_current_user)], site: str | None = None):
+    """Door list cache hit/miss counters (?site=all for every site)."""
+    sites = get_sites().select(site)
+    if not wants_fan_out(site):
+        return {"status": 200, "cache": get_door_cache(sites[0].name).stats()}
+    return {"status": 200, "caches": {s.name: get_door_cache(s.name).stats() for s in sites}}
@@ -0,0 +1,15 @@
+# backend/controllers/metrics_controller.py
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.backend.services.metrics_service import REGISTRY
+
+router = APIRouter(tags=["Metrics"])
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint (unauthenticated, like most exporters; restrict it at the network level)."""
+    return PlainTextResponse(REGISTRY.render(), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -1,9 +1,20 @@
 # backend/controllers/visitorlist_controller.py (FINAL WORKING CODE)
 
-from fastapi import APIRouter, Depends, HTTPException, status 
-import requests # <-- REQUIRED for the API call
-from app.backend.services.signature_service import SignatureService
+import asyncio
+import json
+from fastapi import APIRouter, Body, Depends, HTTPException, Request, status 
+from fastapi.responses import StreamingResponse
+from app.backend.config import settings
+from app.backend.services.artemis_client import ArtemisConnectionError
 from app.backend.services.auth_service import get_current_user, User 
+from app.backend.services.response_cache import visitor_cache
+from app.backend.services.response_service import (
+    cached_body_response, parse_vms_json, render_cached_body, upstream_code, vms_body
+)
+from app.backend.services.site_service import (
+    fan_out, get_site, get_sites, on_sites_changed, raise_all_failed, site_status, wants_fan_out
+)
+from app.backend.services.upstream_limiter import UpstreamBusyError
 from typing import Annotated 
 
 router = APIRouter(prefix="/visitor", tags=["Visitor List"])
@@ -14,36 +25,22 @@ FULL_API_PATH = "/artemis/api/visitor/v1/visitor/visitorInfo"
 SHORT_API_PATH = "/api/visitor/v1/visitor/visitorInfo" 
 
 
-@router.post("/list")
-# JWT Protection is now enabled
-def get_visitor_list(request_body: dict, current_user: Annotated[User, Depends(get_current_user)]):
-    
-    # 1. Use the FULL_API_PATH for signature generation
-    signature = SignatureService.generate_signature(
-        "POST",
-        FULL_API_PATH, 
-        request_body
-    )
-
-    headers = {
-        "Accept": "application/json",
-        "Content-Type": "application/json;charset=UTF-8",
-        "Content-MD5": signature["Content-MD5"],
-        "X-Ca-Key": signature["X-Ca-Key"],
-        "X-Ca-Signature": signature["X-Ca-Signature"],
-        "X-Ca-Signature-Headers": signature["X-Ca-Signature-Headers"],
-    }
-
-    # 2. CRITICAL FIX: EXECUTE THE API CALL
-    # Use the SHORT_API_PATH for execution (Host + Short Path = Correct URL)
+async def _site_visitor_body(site, request_body):
+    """One site's visitorInfo answer as a CachedBody; raises HTTPException on a VMS failure."""
+
+    # 1. Front-desk screens repeat the same query; answer from the cache when we can
+    cache_key = visitor_cache.key_for(f"{site.name}:{SHORT_API_PATH}", request_body)
+    cached = visitor_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    # A registration clearing the cache while this call is in flight must win
+    generation = visitor_cache.generation
+
+    # 2. EXECUTE THE API CALL over the site's keep-alive pool
+    # The client signs FULL_API_PATH and posts to Host + SHORT_API_PATH
     try:
-        response = requests.post(
-            signature["Host"] + SHORT_API_PATH,
-            headers=headers,
-            json=request_body,
-            verify=False
-        )
-    except requests.exceptions.RequestException as e:
+        response = await site.client.post(SHORT_API_PATH, request_body, idempotent=True)
+    except ArtemisConnectionError as e:
          # Handle network/connection failures cleanly
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -58,4 +55,147 @@ def get_visitor_list(request_body: dict, current_user: Annotated[User, Depends(g
             detail=f"VMS API Request Failed. Status: {response.status_code}. VMS Response: {response.text[:200]}"
         )
 
-    return response.json()
\ No newline at end of file
+    raw = response.content
+    body = vms_body(raw)
+
+    # 4. Only successful VMS answers are cached; the entry keeps its ETag and compressed forms
+    if upstream_code(raw) == "0":
+        visitor_cache.put(cache_key, body, body.size, generation)
+
+    return body
+
+
+async def _site_visitor_page(site, request_body):
+    """One site's visitorInfo page for a fan-out merge; a VMS error code fails the site."""
+    data = parse_vms_json((await _site_visitor_body(site, request_body)).body)
+    if str(data.get("code")) != "0":
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"VMS code {data.get('code')}: {data.get('msg')}"
+        )
+    return data.get("data") or {}
+
+
+@router.post("/list")
+# JWT Protection is now enabled
+async def get_visitor_list(request: Request, request_body: dict, current_user: Annotated[User, Depends(get_current_user)],
+                           site: str | None = None):
+    """visitorInfo of one site (?site=name, the default site if omitted), or of several
+    merged (?site=all or ?site=a,b): totals are summed, records tagged with their site,
+    and sites that fail or miss SITE_FANOUT_TIMEOUT are listed under "sites"."""
+    sites = get_sites().select(site)
+    if not wants_fan_out(site):
+        return cached_body_response(request, await _site_visitor_body(sites[0], request_body))
+
+    results = await fan_out(sites, lambda s: _site_visitor_page(s, request_body))
+    pages = {name: page for name, (state, page) in results.items() if state == "ok"}
+    if not pages:
+        raise_all_failed(results)
+
+    partial = len(pages) < len(results)
+    return cached_body_response(request, render_cached_body({
+        "code": "0",
+        "msg": "Partial results" if partial else "Success",
+        "data": {
+            "total": sum(int(page.get("total") or 0) for page in pages.values()),
+            "pageNo": request_body.get("pageNo"),
+            "pageSize": request_body.get("pageSize"),
+            "list": [dict(record, site=name) for name, page in pages.items() for record in page.get("list") or []]
+        },
+        "sites": site_status(results),
+        "partial": partial
+    }))
+
+
+# Entries are keyed by a hash that includes the site name, so a changed or
+# removed site can't be dropped on its own; clear them all
+on_sites_changed(lambda changed, removed: visitor_cache.clear())
+
+
+@router.get("/cache/stats")
+async def visitor_cache_stats(current_user: Annotated[User, Depends(get_current_user)]):
+    """Visitor list cache hit/miss counters and memory use."""
+    return {"status": 200, "cache": visitor_cache.stats()}
+
+
+async def _fetch_visitor_page(site, query, page_no):
+    """Fetches one page of a site's visitorInfo for the export; raises HTTPException on any VMS failure."""
+    page_body = dict(query, pageNo=page_no, pageSize=settings.VISITOR_EXPORT_PAGE_SIZE)
+    try:
+        response = await site.client.post(SHORT_API_PATH, page_body, idempotent=True)
+    except ArtemisConnectionError as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Network connection failed when reaching VMS host: {e}"
+        )
+    except UpstreamBusyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
+    if response.status_code != 200:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, 
+            detail=f"VMS API Request Failed. Status: {response.status_code}. VMS Response: {response.text[:200]}"
+        )
+
+    data = parse_vms_json(response.content)
+    if str(data.get("code")) != "0":
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"VMS API Request Failed on visitor page {page_no}. VMS code {data.get('code')}: {data.get('msg')}"
+        )
+    return data.get("data") or {}
+
+
+def _is_last_page(page, page_no):
+    records = page.get("list") or []
+    total = int(page.get("total") or 0)
+    return len(records) < settings.VISITOR_EXPORT_PAGE_SIZE or page_no * settings.VISITOR_EXPORT_PAGE_SIZE >= total
+
+
+async def _export_lines(site, query, first_page):
+    """Yields one NDJSON chunk per page while the next page is already being fetched."""
+    page, page_no = first_page, 1
+    next_page = None
+    try:
+        while True:
+            if not _is_last_page(page, page_no):
+                next_page = asyncio.ensure_future(_fetch_visitor_page(site, query, page_no + 1))
+
+            records = page.get("list") or []
+            if records:
+                yield "".join(json.dumps(record, separators=(',', ':'), ensure_ascii=False) + "\n" for record in records)
+
+            if next_page is None:
+                return
+            try:
+                page = await next_page
+            except HTTPException as e:
+                # Headers are already sent; end the stream with an error record the reader can detect
+                yield json.dumps({"error": e.detail, "pageNo": page_no + 1}) + "\n"
+                return
+            next_page = None
+            page_no += 1
+    finally:
+        # Client went away mid-export: don't leave the prefetch running
+        if next_page is not None and not next_page.done():
+            next_page.cancel()
+
+
+@router.post("/export")
+async def export_visitors(current_user: Annotated[User, Depends(get_current_user)], request_body: dict = Body(default={}),
+                          site: str | None = None):
+    """Streams every visitor matching the query as NDJSON, walking all visitorInfo pages
+    of one site (?site=name, the default site if omitted)."""
+    if wants_fan_out(site):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Export runs against one site at a time; pass ?site=<name>."
+        )
+    export_site = get_site(site)
+    # Fetch page 1 up front so VMS/credential errors still get a proper HTTP status
+    first_page = await _fetch_visitor_page(export_site, request_body, 1)
+    return StreamingResponse(_export_lines(export_site, request_body, first_page), media_type="application/x-ndjson")
\ No newline at end of file
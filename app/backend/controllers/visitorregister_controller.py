@@ -1,8 +1,14 @@
 # backend/controllers/visitorregister_controller.py
+import asyncio
+import logging
 from fastapi import APIRouter, Depends, HTTPException, status 
-import requests
-from app.backend.services.signature_service import SignatureService
+from app.backend.config import settings
+from app.backend.services.artemis_client import ArtemisConnectionError
 from app.backend.services.auth_service import get_current_user, User 
+from app.backend.services.response_cache import visitor_cache
+from app.backend.services.response_service import parse_vms_json, upstream_code, vms_response
+from app.backend.services.site_service import get_artemis_client
+from app.backend.services.upstream_limiter import UpstreamBusyError
 from typing import Annotated 
 
 router = APIRouter(prefix="/visitor", tags=["Visitor Registration"])
@@ -14,31 +20,19 @@ FULL_API_PATH = "/artemis" + SHORT_API_PATH
 
 @router.post("/register")
 # Assuming JWT is re-enabled for final production code
-def register_visitor(request_body: dict, current_user: Annotated[User, Depends(get_current_user)]):
-
-    # 1. Use the FULL_API_PATH for signature generation (CRITICAL FIX)
-    signature = SignatureService.generate_signature(
-        "POST",
-        FULL_API_PATH, # <-- Uses the full path for signing
-        request_body
-    )
-
-    headers = {
-        "Accept": "application/json",
-        "Content-Type": "application/json;charset=UTF-8",
-        "Content-MD5": signature["Content-MD5"],
-        "X-Ca-Key": signature["X-Ca-Key"],
-        "X-Ca-Signature": signature["X-Ca-Signature"],
-        "X-Ca-Signature-Headers": signature["X-Ca-Signature-Headers"],
-    }
-
-    # 2. Use the SHORT_API_PATH for execution (to prevent 404/double slash)
-    response = requests.post(
-        signature["Host"] + SHORT_API_PATH, # Host (ending in /artemis) + Short Path
-        headers=headers,
-        json=request_body,
-        verify=False
-    )
+async def register_visitor(request_body: dict, current_user: Annotated[User, Depends(get_current_user)],
+                           site: str | None = None):
+
+    # 1. The site's client (default site unless ?site=) signs FULL_API_PATH and posts to Host + SHORT_API_PATH
+    # Sent once only: a retried appointment could be registered twice
+    client = get_artemis_client(site)
+    try:
+        response = await client.post(SHORT_API_PATH, request_body)
+    except ArtemisConnectionError as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Network connection failed when reaching VMS host: {e}"
+        )
     
     # Debugging check: If VMS fails, return detailed error
     if response.status_code != 200:
@@ -47,4 +41,70 @@ def register_visitor(request_body: dict, current_user: Annotated[User, Depends(g
             detail=f"VMS API Request Failed. Status: {response.status_code}. VMS Response: {response.text[:200]}"
         )
 
-    return response.json()
\ No newline at end of file
+    raw = response.content
+
+    # A new appointment changes visitor query results
+    if upstream_code(raw) == "0":
+        visitor_cache.clear()
+
+    return vms_response(raw)
+
+
+async def _register_one(client, index, request_body, semaphore):
+    """Submits one appointment of a bulk batch; failures are reported, never raised."""
+    async with semaphore:
+        try:
+            response = await client.post(SHORT_API_PATH, request_body)
+        except ArtemisConnectionError as e:
+            return {"index": index, "success": False, "status": None, "code": None,
+                    "msg": f"Network connection failed when reaching VMS host: {e}"}
+        except UpstreamBusyError as e:
+            return {"index": index, "success": False, "status": 503, "code": None, "msg": str(e)}
+        except Exception as e:
+            # e.g. no VMS credentials (or removed by a hot reload), an unsignable body
+            logging.warning(f"Bulk registration item {index} failed before reaching the VMS: {e}")
+            return {"index": index, "success": False, "status": None, "code": None,
+                    "msg": f"Request could not be sent to VMS: {e}"}
+
+    if response.status_code != 200:
+        return {"index": index, "success": False, "status": response.status_code, "code": None,
+                "msg": f"VMS API Request Failed. VMS Response: {response.text[:200]}"}
+
+    try:
+        data = parse_vms_json(response.content)
+    except ValueError:
+        return {"index": index, "success": False, "status": 200, "code": None,
+                "msg": f"Invalid VMS response: {response.text[:200]}"}
+
+    return {"index": index, "success": str(data.get("code")) == "0", "status": 200,
+            "code": data.get("code"), "msg": data.get("msg"), "data": data.get("data")}
+
+
+@router.post("/register/bulk")
+async def register_visitors_bulk(request_body: list[dict], current_user: Annotated[User, Depends(get_current_user)],
+                                 site: str | None = None):
+    """Registers many appointments with bounded concurrency; one failure never aborts the batch."""
+    if len(request_body) > settings.BULK_REGISTER_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Bulk registration accepts at most {settings.BULK_REGISTER_MAX_ITEMS} visitors per call."
+        )
+
+    client = get_artemis_client(site)
+    semaphore = asyncio.Semaphore(settings.BULK_REGISTER_CONCURRENCY)
+    results = await asyncio.gather(*(
+        _register_one(client, index, item, semaphore) for index, item in enumerate(request_body)
+    ))
+
+    succeeded = sum(1 for result in results if result["success"])
+    if succeeded:
+        # New appointments change visitor query results
+        visitor_cache.clear()
+
+    return {
+        "status": 200,
+        "total": len(results),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "results": results
+    }
\ No newline at end of file
@@ -0,0 +1,41 @@
+# backend/middleware/metrics.py
+
+import time
+
+from app.backend.services.metrics_service import HTTP_IN_FLIGHT, HTTP_LATENCY, HTTP_REQUESTS
+
+
+class MetricsMiddleware:
+    """Counts requests and records latency per route template (e.g. /api/doors/door/linked).
+
+    Labelling by the matched route rather than the raw URL keeps the number of
+    series bounded; unmatched paths are reported as "unmatched".
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            HTTP_LATENCY.observe((method, route_path), time.perf_counter() - start)
+            HTTP_REQUESTS.inc((method, route_path, str(status_code)))
@@ -0,0 +1,42 @@
+# backend/middleware/server_timing.py
+
+import time
+
+from starlette.datastructures import MutableHeaders
+
+from app.backend.services import timing_service
+
+
+class ServerTimingMiddleware:
+    """Adds a Server-Timing header (auth, sign, connect, ttfb, parse, serialize, total)
+    to responses under the given path prefixes.
+
+    Phases are recorded by the shared services (auth, ArtemisClient, response
+    helpers) into a per-request context variable, so controllers need no
+    timing code. Phases finishing after the headers are sent (e.g. later pages
+    of a streamed export) are not included.
+    """
+
+    def __init__(self, app, prefixes=()):
+        self.app = app
+        self.prefixes = tuple(prefixes)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.prefixes):
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        token = timing_service.start_request()
+        phases = timing_service.current_phases()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", timing_service.header_value(phases, time.perf_counter() - start))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            timing_service.end_request(token)
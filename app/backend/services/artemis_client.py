@@ -0,0 +1,224 @@
+# backend/services/artemis_client.py
+
+import asyncio
+import logging
+import random
+import time
+import httpx
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+from starlette.concurrency import run_in_threadpool
+
+from app.backend.config import settings
+from app.backend.services.metrics_service import (
+    UPSTREAM_IN_FLIGHT, UPSTREAM_LATENCY, UPSTREAM_RETRIES
+)
+from app.backend.services.response_cache import request_key
+from app.backend.services.response_service import upstream_code
+from app.backend.services.signature_service import get_signing_context
+from app.backend.services.singleflight import SingleFlight
+from app.backend.services.upstream_limiter import UpstreamLimiter
+from app.backend.services import timing_service
+
+logger = logging.getLogger(__name__)
+
+# Gateway-level failures worth another try on an idempotent read
+RETRYABLE_STATUS = frozenset({502, 503, 504})
+
+# The VMS box ships with a self-signed certificate
+if not settings.ARTEMIS_VERIFY_SSL:
+    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+
+class ArtemisConnectionError(Exception):
+    """Raised when the VMS host cannot be reached (both async and blocking modes)."""
+
+
+class ArtemisClient:
+    """Signs and sends Artemis OpenAPI calls over one pooled keep-alive connection pool."""
+
+    def __init__(self, host=None, use_async=None, signing_context=None):
+        self.host = host or settings.ARTEMIS_HOST
+        # Callable returning the SigningContext to sign with; looked up per call so key reloads apply
+        self.signing_context = signing_context or get_signing_context
+        self.use_async = settings.ARTEMIS_ASYNC if use_async is None else use_async
+        self.async_client = None
+        self.session = None
+        self.singleflight = SingleFlight()
+        # Calls in post() right now, so a retired pool is only closed once they finish
+        self.in_flight = 0
+        # Caps what this worker sends to the VMS (in-flight, rate, per-endpoint)
+        self.limiter = UpstreamLimiter.from_settings()
+
+        if self.use_async:
+            # Non-blocking pool: waiting on the VMS box never pins a worker thread
+            self.async_client = httpx.AsyncClient(
+                verify=settings.ARTEMIS_VERIFY_SSL,
+                timeout=httpx.Timeout(
+                    settings.ARTEMIS_READ_TIMEOUT,
+                    connect=settings.ARTEMIS_CONNECT_TIMEOUT,
+                    pool=settings.ARTEMIS_CONNECT_TIMEOUT,
+                ),
+                limits=httpx.Limits(
+                    max_connections=settings.ARTEMIS_POOL_MAXSIZE,
+                    max_keepalive_connections=settings.ARTEMIS_POOL_MAXSIZE,
+                    keepalive_expiry=settings.ARTEMIS_KEEPALIVE_EXPIRY,
+                ),
+            )
+        else:
+            # Blocking fallback: pool_maxsize is the per-host connection limit; pool_block keeps it bounded
+            adapter = HTTPAdapter(
+                pool_connections=settings.ARTEMIS_POOL_CONNECTIONS,
+                pool_maxsize=settings.ARTEMIS_POOL_MAXSIZE,
+                pool_block=settings.ARTEMIS_POOL_BLOCK,
+            )
+            self.session = requests.Session()
+            self.session.mount("https://", adapter)
+            self.session.mount("http://", adapter)
+            self.session.verify = settings.ARTEMIS_VERIFY_SSL
+
+    async def post(self, short_path, body, idempotent=False):
+        """POST a signed JSON body (dict or pre-serialized bytes) to host + short_path and return the raw response.
+
+        idempotent=True marks a read (door list, visitor list): concurrent
+        identical calls share one upstream request, and connection errors,
+        timeouts and 502/503/504 are retried with jittered backoff until
+        ARTEMIS_REQUEST_DEADLINE. Never set it for registrations - a retried
+        appointment could be created twice.
+        """
+        self.in_flight += 1
+        try:
+            if not idempotent:
+                return await self._send(short_path, body, self._deadline())
+            if settings.ARTEMIS_COALESCE:
+                key = request_key(short_path, body)
+                return await self.singleflight.do(key, lambda: self._send_with_retries(short_path, body))
+            return await self._send_with_retries(short_path, body)
+        finally:
+            self.in_flight -= 1
+
+    @staticmethod
+    def _deadline():
+        return time.monotonic() + settings.ARTEMIS_REQUEST_DEADLINE if settings.ARTEMIS_REQUEST_DEADLINE > 0 else None
+
+    async def _send_with_retries(self, short_path, body):
+        deadline = self._deadline()
+        attempt = 0
+        while True:
+            try:
+                response = await self._send(short_path, body, deadline)
+            except ArtemisConnectionError as e:
+                response, reason, error = None, "error", e
+            else:
+                if response.status_code not in RETRYABLE_STATUS:
+                    return response
+                reason, error = str(response.status_code), None
+
+            # Full jitter: sleep a random time up to the exponential backoff cap
+            backoff = random.uniform(
+                0, min(settings.ARTEMIS_RETRY_MAX_BACKOFF, settings.ARTEMIS_RETRY_BACKOFF * 2 ** attempt)
+            )
+            out_of_time = deadline is not None and time.monotonic() + backoff >= deadline
+            if attempt >= settings.ARTEMIS_RETRIES or out_of_time:
+                if error is not None:
+                    raise error
+                return response
+
+            attempt += 1
+            UPSTREAM_RETRIES.inc((short_path, reason))
+            logger.warning(f"Retrying VMS call {short_path} (attempt {attempt + 1}) after {error or 'HTTP ' + reason}")
+            await asyncio.sleep(backoff)
+
+    def _timeouts(self, deadline):
+        """Connect/read timeouts for one attempt, shortened so it can't outlive the deadline."""
+        connect, read = settings.ARTEMIS_CONNECT_TIMEOUT, settings.ARTEMIS_READ_TIMEOUT
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise ArtemisConnectionError("Request deadline exceeded before the VMS call was sent")
+            connect, read = min(connect, remaining), min(read, remaining)
+        return connect, read
+
+    async def _send(self, short_path, body, deadline=None):
+        # The VMS protocol signs the FULL path, but the URL is built from the SHORT path
+        with timing_service.timed("sign"):
+            signature = self.signing_context().sign("POST", "/artemis" + short_path, body)
+
+        headers = {
+            "Accept": "application/json",
+            "Content-Type": "application/json;charset=UTF-8",
+            "Content-MD5": signature["Content-MD5"],
+            "X-Ca-Key": signature["X-Ca-Key"],
+            "X-Ca-Signature": signature["X-Ca-Signature"],
+            "X-Ca-Signature-Headers": signature["X-Ca-Signature-Headers"],
+        }
+        # Send the exact bytes the Content-MD5 was computed over (serialized once)
+        content = signature["Body"]
+        url = self.host + short_path
+
+        # Raises UpstreamBusyError (503) if the call can't be admitted in time
+        async with self.limiter.slot(short_path):
+            connect_timeout, read_timeout = self._timeouts(deadline)
+            start = time.perf_counter()
+            UPSTREAM_IN_FLIGHT.inc()
+            try:
+                if self.use_async:
+                    response = await self.async_client.post(
+                        url, headers=headers, content=content, extensions=timing_service.upstream_trace(),
+                        timeout=httpx.Timeout(read_timeout, connect=connect_timeout, pool=connect_timeout),
+                    )
+                else:
+                    response = await run_in_threadpool(
+                        self.session.post, url, headers=headers, data=content,
+                        timeout=(connect_timeout, read_timeout),
+                    )
+                    # requests can't split out the connect time; elapsed ends at the response headers
+                    timing_service.add("ttfb", response.elapsed.total_seconds())
+            except (httpx.HTTPError, requests.exceptions.RequestException, RuntimeError) as e:
+                # RuntimeError: httpx refuses to send on a client that was already closed
+                UPSTREAM_LATENCY.observe((short_path, "error", ""), time.perf_counter() - start)
+                raise ArtemisConnectionError(str(e) or type(e).__name__) from e
+            finally:
+                UPSTREAM_IN_FLIGHT.dec()
+
+        code = upstream_code(response.content) if response.status_code == 200 else ""
+        UPSTREAM_LATENCY.observe((short_path, str(response.status_code), code or ""), time.perf_counter() - start)
+        return response
+
+    def pool_stats(self):
+        """Open/idle connections in the pool (best effort; reads the transport's pool state)."""
+        total = idle = 0
+        try:
+            if self.use_async:
+                for connection in self.async_client._transport._pool.connections:
+                    total += 1
+                    idle += 1 if connection.is_idle() else 0
+            else:
+                for adapter in self.session.adapters.values():
+                    for key in list(adapter.poolmanager.pools.keys()):
+                        pool = adapter.poolmanager.pools.get(key)
+                        if pool is None or pool.pool is None:
+                            continue
+                        # The queue holds one slot per allowed connection: idle connections or None
+                        slots = list(pool.pool.queue)
+                        pool_idle = sum(1 for conn in slots if conn is not None)
+                        idle += pool_idle
+                        total += pool_idle + (pool.pool.maxsize - len(slots))
+        except AttributeError:
+            pass
+        return {"open": total, "idle": idle, "active": max(total - idle, 0), "max": settings.ARTEMIS_POOL_MAXSIZE}
+
+    async def drain_and_close(self, grace):
+        """Closes the pool once no call is using it, or after grace seconds at most."""
+        give_up = time.monotonic() + grace
+        while self.in_flight > 0 and time.monotonic() < give_up:
+            await asyncio.sleep(0.1)
+        await self.aclose()
+
+    async def aclose(self):
+        if self.async_client is not None:
+            await self.async_client.aclose()
+        if self.session is not None:
+            self.session.close()
+
@@ -1,5 +1,8 @@
 # backend/services/auth_service.py
 
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
 from typing import Annotated
 from fastapi import Depends, HTTPException, status
@@ -9,6 +12,7 @@ from pydantic import BaseModel
 
 # 1. UNCOMMENT THIS (Required for settings.JWT_SECRET_KEY)
 from app.backend.config import settings 
+from app.backend.services.timing_service import timed
 
 # 2. REMOVED the self-import (It was causing a loop)
 
@@ -28,7 +32,43 @@ def create_access_token(data: dict):
     encoded_jwt = jwt.encode(to_encode, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
     return encoded_jwt
 
+# Verified-token cache: token -> (exp timestamp, TokenData). Kiosks reuse the same
+# few tokens thousands of times, so only the first request pays for jwt.decode.
+_token_cache = OrderedDict()
+_token_cache_lock = threading.Lock()
+
+def _cached_token(token: str):
+    with _token_cache_lock:
+        entry = _token_cache.get(token)
+        if entry is None:
+            return None
+        exp, token_data = entry
+        if exp <= time.time():
+            # Expires exactly when the token does
+            del _token_cache[token]
+            return None
+        _token_cache.move_to_end(token)
+        return token_data
+
+def _cache_token(token: str, exp, token_data: TokenData):
+    if settings.TOKEN_CACHE_SIZE <= 0 or exp is None:
+        return
+    with _token_cache_lock:
+        _token_cache[token] = (float(exp), token_data)
+        _token_cache.move_to_end(token)
+        while len(_token_cache) > settings.TOKEN_CACHE_SIZE:
+            _token_cache.popitem(last=False)
+
+def clear_token_cache():
+    """Forget every verified token (e.g. after changing JWT_SECRET_KEY)."""
+    with _token_cache_lock:
+        _token_cache.clear()
+
 def verify_access_token(token: str, credentials_exception):
+    token_data = _cached_token(token)
+    if token_data is not None:
+        return token_data
+
     try:
         payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
         username: str = payload.get("sub")
@@ -37,13 +77,17 @@ def verify_access_token(token: str, credentials_exception):
         token_data = TokenData(username=username)
     except JWTError:
         raise credentials_exception
+
+    _cache_token(token, payload.get("exp"), token_data)
     return token_data
 
-def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]):
+# async: verification is CPU-only, so don't pay a thread pool hop on every request
+async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]):
     """Dependency that verifies the JWT token from the header."""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    return verify_access_token(token, credentials_exception)
\ No newline at end of file
+    with timed("auth"):
+        return verify_access_token(token, credentials_exception)
\ No newline at end of file
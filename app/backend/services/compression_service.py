@@ -0,0 +1,123 @@
+# backend/services/compression_service.py
+
+import gzip
+import hashlib
+import threading
+import zlib
+
+try:
+    import brotli # Optional: enables "br" when installed
+except ImportError:
+    brotli = None
+
+from app.backend.config import settings
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+
+def supported_encodings():
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate_encoding(accept_encoding):
+    """Picks the best encoding we support from an Accept-Encoding header, or None for identity."""
+    if not accept_encoding:
+        return None
+
+    offered = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        offered[name] = q
+
+    best, best_q = None, 0.0
+    # Server preference order breaks ties (br compresses JSON noticeably better)
+    for encoding in supported_encodings():
+        q = offered.get(encoding, offered.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress(body, encoding):
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.COMPRESSION_BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=settings.COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+class StreamCompressor:
+    """Incremental compressor for streaming responses (e.g. the NDJSON export)."""
+
+    def __init__(self, encoding):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=settings.COMPRESSION_BROTLI_QUALITY)
+        else:
+            # wbits 16 + MAX_WBITS writes a gzip header/trailer
+            self._compressor = zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def chunk(self, data):
+        """Compresses and flushes one chunk so the client sees records as they are produced."""
+        if self.encoding == "br":
+            return self._compressor.process(data) + self._compressor.flush()
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        if self.encoding == "br":
+            return self._compressor.finish()
+        return self._compressor.flush()
+
+
+class CachedBody:
+    """Rendered response bytes plus their ETag and compressed forms, each computed once.
+
+    Keep one of these in a cache (e.g. the door list) so identical payloads are
+    never re-hashed or recompressed on each request.
+    """
+
+    def __init__(self, body, media_type="application/json"):
+        self.body = body
+        self.media_type = media_type
+        self._etag = None
+        self._encoded = {}
+        self._lock = threading.Lock()
+        # Called with (self, bytes) whenever an encoded form is added, so a
+        # byte-capped cache holding this body can charge for it
+        self.on_encoded = None
+
+    @property
+    def size(self):
+        """Bytes held: the identity body plus every encoded form made so far."""
+        return len(self.body) + sum(len(data) for data in list(self._encoded.values()))
+
+    @property
+    def etag(self):
+        """Strong ETag of the identity body; encoded forms append "-<encoding>"."""
+        if self._etag is None:
+            self._etag = '"' + hashlib.blake2b(self.body, digest_size=16).hexdigest() + '"'
+        return self._etag
+
+    def etag_for(self, encoding):
+        if encoding is None:
+            return self.etag
+        return self.etag[:-1] + "-" + encoding + '"'
+
+    def encoded(self, encoding):
+        data = self._encoded.get(encoding)
+        if data is None:
+            data = compress(self.body, encoding)
+            with self._lock:
+                if encoding in self._encoded:
+                    # Another thread finished first; keep (and charge for) one copy only
+                    return self._encoded[encoding]
+                self._encoded[encoding] = data
+            if self.on_encoded is not None:
+                self.on_encoded(self, len(data))
+        return data
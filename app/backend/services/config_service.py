@@ -0,0 +1,141 @@
+# backend/services/config_service.py
+
+import asyncio
+import json
+import logging
+import os
+import sys
+
+from app.backend.config import settings
+from app.backend.services.logging_service import get_log_level, set_log_level
+
+logger = logging.getLogger(__name__)
+
+# Config files live next to the EXE (or next to main.py when run as a script), the
+# same rule main.py uses - never the working directory, which differs under NSSM.
+# VMS_CONFIG_DIR overrides it (e.g. for the load test harness).
+if getattr(sys, 'frozen', False):
+    BASE_DIR = os.path.dirname(sys.executable)
+else:
+    BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+CONFIG_DIR = os.getenv("VMS_CONFIG_DIR") or BASE_DIR
+
+SERVER_CONFIG_FILE = "server_config.json"
+
+
+def config_file(name):
+    """Absolute path of a config file in the config directory."""
+    return os.path.join(CONFIG_DIR, name)
+
+
+def read_json_file(path):
+    """Reads a JSON config file. Raises OSError / ValueError so callers can keep the old values."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def update_json_file(path, **values):
+    """Sets keys in a JSON config file, keeping the others. Written via a temp file + rename
+    so a watcher never sees it half written. Raises OSError / ValueError."""
+    try:
+        config = read_json_file(path)
+    except FileNotFoundError:
+        config = {}
+    if not isinstance(config, dict):
+        raise ValueError(f"{path} does not hold a JSON object")
+    config.update(values)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(config, f, indent=4)
+    os.replace(temp_path, path)
+
+
+def _file_signature(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+class ConfigWatcher:
+    """Polls config files by mtime/size and calls their reload callback on change.
+
+    A check is one os.stat per file, so it can run every couple of seconds in
+    each worker. A callback returning False (e.g. the file was caught half
+    written) leaves the file marked as changed, so it's retried next check.
+    """
+
+    def __init__(self, interval=None):
+        self.interval = settings.CONFIG_WATCH_INTERVAL if interval is None else interval
+        self._files = {} # path -> [callback, last signature]
+        self._task = None
+        self.reloads = 0
+
+    def watch(self, path, callback):
+        """Registers path; the current version is treated as already loaded."""
+        self._files[path] = [callback, _file_signature(path)]
+
+    def check(self):
+        """Reloads every watched file whose mtime or size changed. Returns the paths reloaded."""
+        reloaded = []
+        for path, entry in self._files.items():
+            callback, last = entry
+            current = _file_signature(path)
+            if current == last:
+                continue
+            try:
+                ok = callback(path)
+            except Exception as e:
+                logger.warning(f"Reloading {path} failed: {e}")
+                ok = False
+            if ok is not False:
+                entry[1] = current
+                self.reloads += 1
+                reloaded.append(path)
+        return reloaded
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            self.check()
+
+    def start(self):
+        """Starts polling in the current event loop (once per worker process)."""
+        if self.interval > 0 and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+def apply_server_config(path):
+    """Applies the live-reloadable parts of server_config.json (currently log_level).
+
+    Port, protocol, workers and the other server options still need a restart.
+    """
+    try:
+        config = read_json_file(path)
+    except FileNotFoundError:
+        return True
+    except ValueError as e:
+        logger.warning(f"Ignoring unreadable {path}: {e}")
+        return False
+
+    level = config.get("log_level")
+    if level and str(level).upper() != get_log_level():
+        try:
+            logger.warning(f"Log level changed to {set_log_level(level)} from {path}")
+        except ValueError as e:
+            logger.warning(f"Ignoring log_level in {path}: {e}")
+    return True
+
+
+config_watcher = ConfigWatcher()
@@ -0,0 +1,102 @@
+# backend/services/door_cache.py
+
+import asyncio
+import logging
+import time
+
+from app.backend.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class DoorListCache:
+    """In-memory door list with a TTL and stale-while-revalidate background refresh.
+
+    - age < ttl:                 served from memory (hit)
+    - ttl <= age < ttl + stale:  served from memory, one background refresh is started (stale hit)
+    - otherwise / empty:         the caller waits for a fresh load (miss)
+    """
+
+    def __init__(self, loader, ttl=None, stale_ttl=None):
+        self._loader = loader # async callable returning the door list
+        self.ttl = settings.DOOR_CACHE_TTL if ttl is None else ttl
+        self.stale_ttl = settings.DOOR_CACHE_STALE_TTL if stale_ttl is None else stale_ttl
+
+        self._value = None
+        self._loaded_at = 0.0
+        self._generation = 0 # Bumped by invalidate() so in-flight loads can't store old data
+        self._load_lock = None
+        self._refresh_task = None
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+
+    async def get(self):
+        if self.ttl <= 0:
+            # Caching disabled
+            self.misses += 1
+            return await self._loader()
+
+        if self._value is not None:
+            age = time.monotonic() - self._loaded_at
+            if age < self.ttl:
+                self.hits += 1
+                return self._value
+            if age < self.ttl + self.stale_ttl:
+                self.stale_hits += 1
+                self._schedule_refresh()
+                return self._value
+
+        self.misses += 1
+        if self._load_lock is None:
+            self._load_lock = asyncio.Lock()
+        async with self._load_lock:
+            # Another request may have loaded it while we waited
+            if self._value is not None and time.monotonic() - self._loaded_at < self.ttl:
+                return self._value
+            # Return what was loaded even if invalidate() ran meanwhile and it wasn't stored
+            return await self._load()
+
+    async def _load(self):
+        generation = self._generation
+        value = await self._loader()
+        if generation == self._generation:
+            self._value = value
+            self._loaded_at = time.monotonic()
+        return value
+
+    def _schedule_refresh(self):
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._background_refresh())
+
+    async def _background_refresh(self):
+        self.refreshes += 1
+        try:
+            await self._load()
+        except Exception as e:
+            # Keep serving the stale list; the next stale hit will retry
+            self.refresh_errors += 1
+            logger.warning(f"Door list background refresh failed: {e}")
+
+    def invalidate(self):
+        self._generation += 1
+        self._value = None
+        self._loaded_at = 0.0
+
+    def stats(self):
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_ratio": round((self.hits + self.stale_hits) / lookups, 4) if lookups else 0.0,
+            "refreshes": self.refreshes,
+            "refresh_errors": self.refresh_errors,
+            "cached": self._value is not None,
+            "age_seconds": round(time.monotonic() - self._loaded_at, 3) if self._value is not None else None,
+            "ttl_seconds": self.ttl,
+            "stale_ttl_seconds": self.stale_ttl,
+        }
@@ -0,0 +1,69 @@
+# backend/services/endpoint_selector.py
+
+import threading
+import time
+
+from app.backend.config import settings
+
+
+class EndpointSelector:
+    """Remembers which variant of an Artemis API works on each host.
+
+    Variants are listed best-first. Once a variant succeeds on a host it is
+    tried first on every later call. A variant that keeps failing is skipped
+    for a cooldown period (circuit breaker). If the memoized variant is not the
+    best one, the better variants are re-probed every `reprobe_interval` seconds
+    so a VMS upgrade is picked up without a restart.
+    """
+
+    def __init__(self, variants, cooldown=None, failure_threshold=None, reprobe_interval=None):
+        self.variants = list(variants)
+        self.cooldown = settings.ENDPOINT_BREAKER_COOLDOWN if cooldown is None else cooldown
+        self.failure_threshold = settings.ENDPOINT_BREAKER_THRESHOLD if failure_threshold is None else failure_threshold
+        self.reprobe_interval = settings.ENDPOINT_REPROBE_INTERVAL if reprobe_interval is None else reprobe_interval
+
+        self._preferred = {} # host -> variant that last succeeded
+        self._last_probe = {} # host -> when the full best-first order was last tried
+        self._failures = {} # (host, variant) -> consecutive failures
+        self._open_until = {} # (host, variant) -> when the breaker lets the variant through again
+        self._lock = threading.Lock()
+
+    def candidates(self, host):
+        """Variants to try on this host, in order."""
+        now = time.monotonic()
+        with self._lock:
+            preferred = self._preferred.get(host)
+            if preferred is None or preferred == self.variants[0]:
+                ordered = self.variants
+            elif now - self._last_probe.get(host, 0.0) >= self.reprobe_interval:
+                # Time to re-probe the better variants ahead of the memoized one
+                self._last_probe[host] = now
+                ordered = self.variants
+            else:
+                ordered = [preferred] + [v for v in self.variants if v != preferred]
+
+            available = [v for v in ordered if self._open_until.get((host, v), 0.0) <= now]
+
+        # If every breaker is open there is nothing better to do than try them all
+        return available or list(ordered)
+
+    def record_success(self, host, variant):
+        with self._lock:
+            if self._preferred.get(host) != variant:
+                self._preferred[host] = variant
+                self._last_probe[host] = time.monotonic()
+            self._failures.pop((host, variant), None)
+            self._open_until.pop((host, variant), None)
+
+    def record_failure(self, host, variant):
+        with self._lock:
+            key = (host, variant)
+            failures = self._failures.get(key, 0) + 1
+            self._failures[key] = failures
+            if failures >= self.failure_threshold:
+                self._open_until[key] = time.monotonic() + self.cooldown
+                if self._preferred.get(host) == variant:
+                    del self._preferred[host]
+
+    def preferred(self, host):
+        return self._preferred.get(host)
@@ -0,0 +1,148 @@
+# backend/services/logging_service.py
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import socketserver
+import struct
+import threading
+
+LOG_FORMAT = '%(asctime)s %(levelname)s: %(message)s'
+LEVELS = ("CRITICAL", "ERROR", "WARNING", "INFO", "DEBUG")
+
+# Set by main.py in multi-worker mode so each worker process can configure its own logging
+WORKER_LOG_ENV = "VMS_WORKER_LOGGING"
+WORKER_LOG_HOST = "127.0.0.1"
+
+_listener = None
+
+
+def setup_logging(log_file, level="INFO", max_bytes=10 * 1024 * 1024, backup_count=5, rotate_when=None):
+    """Routes all logging through a queue; a background thread does the file I/O.
+
+    The file rotates by size (max_bytes) or, when rotate_when is set (e.g.
+    "midnight", "H"), by time. Request code only ever enqueues a record.
+    """
+    # Validate the level before opening any files
+    set_log_level(level)
+
+    if rotate_when:
+        file_handler = logging.handlers.TimedRotatingFileHandler(
+            log_file, when=rotate_when, backupCount=backup_count, encoding="utf-8"
+        )
+    else:
+        file_handler = logging.handlers.RotatingFileHandler(
+            log_file, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+        )
+    file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    _route_through_queue(file_handler)
+
+
+def _route_through_queue(handler):
+    global _listener
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+
+    if _listener is not None:
+        _listener.stop()
+    _listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=False)
+    _listener.start()
+    # Flush whatever is still queued when the process exits
+    atexit.register(stop_logging)
+
+
+class _WorkerRecordHandler(logging.handlers.SocketHandler):
+    """Sends a worker's records to the supervisor as length-prefixed JSON (never pickle).
+
+    Runs on the worker's queue listener thread. If the supervisor is gone the
+    record is dropped and the connection retried with backoff.
+    """
+
+    def makePickle(self, record):
+        # QueueHandler has already merged args and any traceback into the message
+        payload = json.dumps({
+            "name": record.name,
+            "levelno": record.levelno,
+            "levelname": record.levelname,
+            "msg": record.getMessage(),
+            "created": record.created,
+            "msecs": record.msecs,
+            "process": record.process,
+        }).encode("utf-8")
+        return struct.pack(">L", len(payload)) + payload
+
+
+class _WorkerRecordReceiver(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        while True:
+            header = self.rfile.read(4)
+            if len(header) < 4:
+                return
+            length = struct.unpack(">L", header)[0]
+            payload = self.rfile.read(length)
+            if len(payload) < length:
+                return
+            try:
+                record = logging.makeLogRecord(json.loads(payload))
+            except ValueError:
+                return
+            if _listener is not None:
+                # Written by the supervisor's own listener thread, into its one rotating file
+                _listener.queue.put(record)
+
+
+def start_worker_log_receiver():
+    """Starts, in the supervisor, the loopback receiver workers send their records to. Returns its port."""
+    server = socketserver.ThreadingTCPServer((WORKER_LOG_HOST, 0), _WorkerRecordReceiver)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="worker-log-receiver", daemon=True).start()
+    return server.server_address[1]
+
+
+def configure_worker_logging():
+    """Sets up logging inside a uvicorn worker process (multi-worker mode only).
+
+    Worker processes don't inherit the supervisor's handlers, and several
+    processes can't safely rotate one file, so workers forward their records
+    to the supervisor, which writes the single service_debug.log. Each worker
+    still filters by its own level (see set_log_level).
+    """
+    options = os.environ.get(WORKER_LOG_ENV)
+    if not options or _listener is not None:
+        return
+    options = json.loads(options)
+    set_log_level(options.get("level", "INFO"))
+    _route_through_queue(_WorkerRecordHandler(WORKER_LOG_HOST, options["log_port"]))
+
+
+def is_worker_process():
+    """True inside a uvicorn worker in multi-worker mode (one of several processes)."""
+    return bool(os.environ.get(WORKER_LOG_ENV))
+
+
+def stop_logging():
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def set_log_level(level):
+    """Changes the root log level at runtime. Raises ValueError for unknown names."""
+    name = str(level).upper()
+    if name not in LEVELS:
+        raise ValueError(f"Unknown log level '{level}'. Use one of: {', '.join(LEVELS)}")
+    logging.getLogger().setLevel(name)
+    return name
+
+
+def get_log_level():
+    return logging.getLevelName(logging.getLogger().level)
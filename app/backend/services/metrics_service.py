@@ -0,0 +1,162 @@
+# backend/services/metrics_service.py
+
+import bisect
+import threading
+
+# Seconds; spans a cached hit (~1ms) up to a hung VMS call
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=""):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    TYPE = ""
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {} # label values tuple -> value
+        REGISTRY.register(self)
+
+    def header(self):
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.TYPE}"]
+
+
+class Counter(_Metric):
+    TYPE = "counter"
+
+    def inc(self, labels=(), amount=1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = self.header()
+        for labels, value in list(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(_Metric):
+    TYPE = "gauge"
+
+    def set(self, labels=(), value=0):
+        self._values[labels] = value
+
+    def inc(self, labels=(), amount=1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, labels=(), amount=1):
+        self._values[labels] = self._values.get(labels, 0) - amount
+
+    render = Counter.render
+
+
+class Histogram(_Metric):
+    """Fixed-bucket histogram. observe() is a bisect plus two additions."""
+    TYPE = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, labels, value):
+        series = self._values.get(labels)
+        if series is None:
+            # [per-bucket counts..., +Inf count, sum]
+            series = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self):
+        lines = self.header()
+        for labels, series in list(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {series[-1]!r}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Holds every metric plus scrape-time collectors (cache stats, pool usage)."""
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+
+    def register_collector(self, collector):
+        """collector() returns [(name, type, help, [(labels dict, value), ...]), ...] at scrape time."""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self):
+        lines = []
+        for metric in list(self._metrics):
+            lines.extend(metric.render())
+
+        # Several collectors may report the same family (e.g. one per cache); group them
+        families = {}
+        for collector in list(self._collectors):
+            for name, metric_type, documentation, samples in collector():
+                family = families.setdefault(name, (metric_type, documentation, []))
+                family[2].extend(samples)
+        for name, (metric_type, documentation, samples) in families.items():
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for labels, value in samples:
+                lines.append(f"{name}{_format_labels(labels.keys(), labels.values())} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def register_collector(collector):
+    REGISTRY.register_collector(collector)
+
+
+def cache_collector(name, stats, labels=None):
+    """Builds a collector exposing a cache's stats() dict (hits, misses, hit_ratio, ...)."""
+    series_labels = dict({"cache": name}, **(labels or {}))
+
+    def collect():
+        values = stats()
+        return [
+            (f"vms_cache_{key}", "gauge", f"Cache {key.replace('_', ' ')}", [(series_labels, value)])
+            for key, value in values.items()
+            if isinstance(value, (int, float)) and not isinstance(value, bool)
+        ]
+    return collect
+
+
+# --- Core metrics (per process; in multi-worker mode each worker reports its own) ---
+HTTP_REQUESTS = Counter("vms_http_requests_total", "HTTP requests handled", ("method", "route", "status"))
+HTTP_LATENCY = Histogram("vms_http_request_duration_seconds", "HTTP request latency", ("method", "route"))
+HTTP_IN_FLIGHT = Gauge("vms_http_requests_in_flight", "HTTP requests currently being handled")
+UPSTREAM_LATENCY = Histogram("vms_upstream_request_duration_seconds", "Artemis round-trip latency", ("path", "status", "code"))
+UPSTREAM_IN_FLIGHT = Gauge("vms_upstream_requests_in_flight", "Artemis calls currently in flight")
+UPSTREAM_RETRIES = Counter("vms_upstream_retries_total", "Artemis read calls retried", ("path", "reason"))
+UPSTREAM_REJECTED = Counter("vms_upstream_rejected_total", "Artemis calls refused by the upstream limiter", ("path", "reason"))
@@ -0,0 +1,138 @@
+# backend/services/response_cache.py
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from app.backend.config import settings
+from app.backend.services.metrics_service import cache_collector, register_collector
+
+# Canonical form: key order and whitespace never change the cache key
+_CANONICAL_ENCODER = json.JSONEncoder(sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+
+
+def request_key(path, body):
+    """Stable hash of (path, body): key order and whitespace never change it."""
+    if isinstance(body, (bytes, bytearray)):
+        canonical = bytes(body)
+    else:
+        canonical = _CANONICAL_ENCODER.encode(body).encode('utf-8')
+    return hashlib.sha256(path.encode('utf-8') + b"\n" + canonical).hexdigest()
+
+
+class ResponseCache:
+    """Bounded LRU + TTL cache of upstream responses, keyed by a canonical request body hash.
+
+    Each entry carries its size in bytes; the least recently used entries are
+    evicted until both max_entries and max_bytes hold. Values that grow after
+    being stored (CachedBody adding gzip/br forms) report it via on_encoded
+    and are charged for the extra bytes.
+    """
+
+    def __init__(self, ttl, max_entries, max_bytes):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self._entries = OrderedDict() # key -> (expires_at, size, value)
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        # Bumped by clear(); read before an upstream call and passed to put() so an
+        # answer fetched before the clear can't be stored after it
+        self.generation = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def key_for(path, body):
+        return request_key(path, body)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, size, value = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value, size, generation=None):
+        if self.ttl <= 0 or size > self.max_bytes:
+            return
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, size, value)
+            self._total_bytes += size
+            self._evict()
+        if hasattr(value, "on_encoded"):
+            value.on_encoded = lambda body, added: self._charge(key, body, added)
+
+    def _charge(self, key, value, added):
+        with self._lock:
+            entry = self._entries.get(key)
+            # Ignore bodies that were already evicted or replaced
+            if entry is None or entry[2] is not value:
+                return
+            expires_at, size, _ = entry
+            self._entries[key] = (expires_at, size + added, value)
+            self._total_bytes += added
+            self._evict()
+
+    def _evict(self):
+        while len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._total_bytes -= size
+
+    def clear(self):
+        """Drops every entry, including answers still in flight (see generation).
+
+        Caches are per process: in multi-worker mode this only clears the
+        current worker's cache; the others keep entries until their TTL ends.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+            self.generation += 1
+            self.invalidations += 1
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "entries": len(self._entries),
+            "bytes": self._total_bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "ttl_seconds": self.ttl,
+        }
+
+
+# Shared by the visitor list (reads) and visitor registration (invalidates on success)
+visitor_cache = ResponseCache(
+    ttl=settings.VISITOR_CACHE_TTL,
+    max_entries=settings.VISITOR_CACHE_MAX_ENTRIES,
+    max_bytes=settings.VISITOR_CACHE_MAX_BYTES,
+)
+register_collector(cache_collector("visitor_list", visitor_cache.stats))
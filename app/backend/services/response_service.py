@@ -0,0 +1,113 @@
+# backend/services/response_service.py
+
+import json
+import re
+from fastapi.responses import JSONResponse, Response
+
+try:
+    import orjson # Optional fast serializer
+except ImportError:
+    orjson = None
+
+from app.backend.config import settings
+from app.backend.services.compression_service import CachedBody, negotiate_encoding
+from app.backend.services.timing_service import timed
+
+# Artemis always puts "code" first: {"code":"0","msg":"Success","data":{...}}
+_LEADING_CODE = re.compile(rb'^\s*\{\s*"code"\s*:\s*"?([^",}\s]*)')
+
+_COMPACT_ENCODER = json.JSONEncoder(separators=(',', ':'), ensure_ascii=False)
+
+
+def upstream_code(raw):
+    """Reads the top-level VMS "code" from a raw body without parsing the whole document."""
+    match = _LEADING_CODE.match(raw)
+    if match:
+        return match.group(1).decode('utf-8')
+    # Unusual key order: fall back to a full parse
+    try:
+        data = json.loads(raw)
+    except ValueError:
+        return None
+    return str(data.get("code")) if isinstance(data, dict) else None
+
+
+def vms_response(raw):
+    """Returns an upstream JSON body to the client.
+
+    In passthrough mode the Artemis bytes are forwarded as-is; otherwise the
+    body is parsed and re-encoded by FastAPI as before.
+    """
+    if settings.VMS_PASSTHROUGH:
+        return Response(content=raw, media_type="application/json")
+    return parse_vms_json(raw)
+
+
+def parse_vms_json(raw):
+    """json.loads for an upstream body, counted as the "parse" Server-Timing phase."""
+    with timed("parse"):
+        return json.loads(raw)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson when installed, else a compact stdlib encoder.
+
+    Return it directly from routes that reshape data so FastAPI's
+    jsonable_encoder pass is skipped; the content must already be plain JSON types.
+    """
+
+    def render(self, content):
+        with timed("serialize"):
+            if orjson is not None:
+                return orjson.dumps(content)
+            return _COMPACT_ENCODER.encode(content).encode('utf-8')
+
+
+def vms_body(raw):
+    """Wraps an upstream JSON body as a CachedBody (raw bytes in passthrough mode, else parsed and re-encoded)."""
+    if settings.VMS_PASSTHROUGH:
+        return CachedBody(raw)
+    return render_cached_body(parse_vms_json(raw))
+
+
+def etag_matches(if_none_match, etag):
+    """True if an If-None-Match header matches etag or one of its encoded variants."""
+    if not if_none_match:
+        return False
+    opaque = etag.strip('"')
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*":
+            return True
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        tag = tag.strip('"')
+        if tag == opaque or tag.rpartition("-")[0] == opaque:
+            return True
+    return False
+
+
+def render_cached_body(content):
+    """Renders content once with FastJSONResponse so it can be cached as a CachedBody."""
+    return CachedBody(FastJSONResponse(content).body)
+
+
+def cached_body_response(request, cached):
+    """Serves a CachedBody: 304 when the client's ETag still matches, otherwise the body,
+    reusing its stored compressed form when the client accepts one."""
+    headers = {}
+    encoding = None
+    if settings.COMPRESSION_ENABLED and len(cached.body) >= settings.COMPRESSION_MIN_SIZE:
+        headers["Vary"] = "Accept-Encoding"
+        encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+
+    if settings.ETAG_ENABLED:
+        # Each representation gets its own strong ETag
+        headers["ETag"] = cached.etag_for(encoding)
+        if etag_matches(request.headers.get("if-none-match"), cached.etag):
+            return Response(status_code=304, headers=headers)
+
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+        return Response(content=cached.encoded(encoding), media_type=cached.media_type, headers=headers)
+    return Response(content=cached.body, media_type=cached.media_type, headers=headers)
@@ -4,73 +4,217 @@ import hmac
 import hashlib
 import base64
 import json
-import os 
+import logging
+import threading
+from collections import OrderedDict
 from pathlib import Path 
 # from backend.config import settings
 
+try:
+    import orjson # Optional fast serializer
+except ImportError:
+    orjson = None
+
+from app.backend.config import settings
 from app.backend.config import ARTEMIS_HOST # Statically imported host
 from app.backend.config import APP_KEY, APP_SECRET # Import the empty placeholders
+from app.backend.services.config_service import config_file, read_json_file
+
+logger = logging.getLogger(__name__)
 
-# Define the file path for dynamic VMS credentials
+# Define the file name for dynamic VMS credentials (resolved next to the executable)
 VMS_KEYS_FILE = "vms_keys.json" 
 
-def load_vms_credentials():
-    """Loads APP_KEY and APP_SECRET from the local JSON file (set by the UI)."""
-    # The VMS_KEYS_FILE is expected to be next to the executable (in the dist folder)
-    if os.path.exists(VMS_KEYS_FILE):
-        try:
-            with open(VMS_KEYS_FILE, 'r') as f:
-                data = json.load(f)
-                return data.get('APP_KEY', ''), data.get('APP_SECRET', '')
-        except Exception:
-            pass
-    # Return empty strings if file or keys are missing
+# The manager UI saves partner_key/partner_secret; APP_KEY/APP_SECRET is the older spelling
+_KEY_FIELDS = (("APP_KEY", "APP_SECRET"), ("partner_key", "partner_secret"))
+
+
+def read_vms_credentials(path):
+    """Reads (key, secret) from a keys file. Raises OSError / ValueError if it can't be read."""
+    data = read_json_file(path)
+    if not isinstance(data, dict):
+        raise ValueError("expected a JSON object")
+    for key_field, secret_field in _KEY_FIELDS:
+        if data.get(key_field) or data.get(secret_field):
+            return str(data.get(key_field) or ''), str(data.get(secret_field) or '')
     return '', ''
 
-# Load credentials once when the service starts
+
+def load_vms_credentials(path=None):
+    """Loads the VMS key pair from vms_keys.json (set by the UI); empty strings if missing or unreadable."""
+    try:
+        return read_vms_credentials(path or config_file(VMS_KEYS_FILE))
+    except (OSError, ValueError):
+        # Return empty strings if file or keys are missing
+        return '', ''
+
+# Loaded when the service starts; reload_vms_credentials() replaces them live
 VMS_APP_KEY, VMS_APP_SECRET = load_vms_credentials()
 
 
-class SignatureService:
+# Built once; json.dumps() with non-default options constructs a new encoder per call
+_COMPACT_ENCODER = json.JSONEncoder(separators=(',', ':'), ensure_ascii=False)
 
-    @staticmethod
-    def generate_signature(method, api_path, body):
-        
-        # 1. Use the dynamically loaded credentials
-        APP_KEY = VMS_APP_KEY
-        APP_SECRET = VMS_APP_SECRET
-        # HOST = settings.ARTEMIS_HOST
-        if not APP_KEY or not APP_SECRET:
-             # This will trigger if the user hasn't saved the credentials yet
-             raise Exception("VMS Credentials not configured. Please set them in the UI.")
-
-        # 2. Signature calculation logic (uses APP_KEY, APP_SECRET)
-        body_str = json.dumps(body)
-        content_md5 = base64.b64encode(hashlib.md5(body_str.encode('utf-8')).digest()).decode('utf-8')
-
-        accept = "application/json"
-        content_type = "application/json;charset=UTF-8"
-        signature_headers = "x-ca-key"
-        
-        headers_to_sign = f"x-ca-key:{APP_KEY}\n"
 
+def serialize_body(body):
+    """Serializes a request body exactly once; these bytes are both hashed and sent."""
+    if isinstance(body, (bytes, bytearray)):
+        return bytes(body)
+
+    serializer = settings.ARTEMIS_JSON_SERIALIZER
+    if serializer == "orjson" and orjson is not None:
+        return orjson.dumps(body)
+    if serializer == "standard":
+        return json.dumps(body).encode('utf-8')
+    return _COMPACT_ENCODER.encode(body).encode('utf-8')
+
+
+class SigningContext:
+    """Pre-computed signing state for one APP_KEY / APP_SECRET pair.
+
+    The secret is keyed into an HMAC once and copied per call, Content-MD5 values
+    are kept in a bounded LRU, and full signatures for small repeated bodies
+    (e.g. the constant door list page request) are memoized. The Artemis
+    signature has no timestamp or nonce, so a memoized signature stays valid.
+    """
+
+    ACCEPT = "application/json"
+    CONTENT_TYPE = "application/json;charset=UTF-8"
+    SIGNATURE_HEADERS = "x-ca-key"
+
+    def __init__(self, app_key, app_secret, host, cache_size=None, max_cached_body=None):
+        self.app_key = app_key
+        self.host = host
+        self.cache_size = settings.SIGNATURE_CACHE_SIZE if cache_size is None else cache_size
+        self.max_cached_body = settings.SIGNATURE_CACHE_MAX_BODY if max_cached_body is None else max_cached_body
+
+        # Everything after Content-Type in the string-to-sign is fixed per key
+        self._signed_headers = f"x-ca-key:{app_key}\n"
+        self._hmac = hmac.new(app_secret.encode('utf-8'), digestmod=hashlib.sha256)
+
+        self._md5_cache = OrderedDict()
+        self._signature_cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _cache_get(self, cache, key):
+        with self._lock:
+            value = cache.get(key)
+            if value is not None:
+                cache.move_to_end(key)
+            return value
+
+    def _cache_put(self, cache, key, value):
+        with self._lock:
+            cache[key] = value
+            cache.move_to_end(key)
+            if len(cache) > self.cache_size:
+                cache.popitem(last=False)
+
+    def content_md5(self, body_bytes):
+        """Base64 MD5 of the body, memoized for small bodies."""
+        cacheable = len(body_bytes) <= self.max_cached_body
+        if cacheable:
+            content_md5 = self._cache_get(self._md5_cache, body_bytes)
+            if content_md5 is not None:
+                return content_md5
+
+        content_md5 = base64.b64encode(hashlib.md5(body_bytes).digest()).decode('utf-8')
+        if cacheable:
+            self._cache_put(self._md5_cache, body_bytes, content_md5)
+        return content_md5
+
+    def sign(self, method, api_path, body):
+        """Returns the signature headers plus the canonical "Body" bytes that were hashed."""
+        body_bytes = serialize_body(body)
+        cacheable = len(body_bytes) <= self.max_cached_body
+
+        if cacheable:
+            cache_key = (method, api_path, body_bytes)
+            cached = self._cache_get(self._signature_cache, cache_key)
+            if cached is not None:
+                return cached
+
+        content_md5 = self.content_md5(body_bytes)
         string_to_sign = (
             f"{method}\n"
-            f"{accept}\n"
+            f"{self.ACCEPT}\n"
             f"{content_md5}\n"
-            f"{content_type}\n"
-            f"{headers_to_sign}"
+            f"{self.CONTENT_TYPE}\n"
+            f"{self._signed_headers}"
             f"{api_path}"
         )
 
-        hmac_sha256 = hmac.new(APP_SECRET.encode('utf-8'), string_to_sign.encode('utf-8'), hashlib.sha256)
-        signature = base64.b64encode(hmac_sha256.digest()).decode('utf-8')
+        mac = self._hmac.copy()
+        mac.update(string_to_sign.encode('utf-8'))
+        signature = base64.b64encode(mac.digest()).decode('utf-8')
 
-        return {
+        result = {
             "Content-MD5": content_md5,
-            "X-Ca-Key": APP_KEY,
+            "X-Ca-Key": self.app_key,
             "X-Ca-Signature": signature,
-            "X-Ca-Signature-Headers": signature_headers,
-            # "Host": ARTEMIS_HOST # Static host is still used
-            "Host": ARTEMIS_HOST
-        }
\ No newline at end of file
+            "X-Ca-Signature-Headers": self.SIGNATURE_HEADERS,
+            "Body": body_bytes,
+            "Host": self.host
+        }
+        if cacheable:
+            self._cache_put(self._signature_cache, cache_key, result)
+        return result
+
+
+_signing_context = None
+_signing_context_lock = threading.Lock()
+
+
+def get_signing_context():
+    """Returns the process-wide SigningContext, built from the loaded credentials on first use."""
+    global _signing_context
+    # One read of the global: a concurrent reload swaps it, never mutates it
+    context = _signing_context
+    if context is None:
+        with _signing_context_lock:
+            if _signing_context is None:
+                if not VMS_APP_KEY or not VMS_APP_SECRET:
+                    # This will trigger if the user hasn't saved the credentials yet
+                    raise Exception("VMS Credentials not configured. Please set them in the UI.")
+                _signing_context = SigningContext(VMS_APP_KEY, VMS_APP_SECRET, ARTEMIS_HOST)
+            context = _signing_context
+    return context
+
+
+def reload_vms_credentials(path=None):
+    """Re-reads vms_keys.json and atomically swaps in a new SigningContext.
+
+    Requests already signing keep the context they started with; the pooled
+    VMS connections are untouched. Returns False (keeping the current keys)
+    if the file can't be parsed, e.g. because it is being written.
+    """
+    global VMS_APP_KEY, VMS_APP_SECRET, _signing_context
+    path = path or config_file(VMS_KEYS_FILE)
+    try:
+        app_key, app_secret = read_vms_credentials(path)
+    except FileNotFoundError:
+        app_key, app_secret = '', ''
+    except (OSError, ValueError) as e:
+        logger.warning(f"Keeping current VMS credentials; could not read {path}: {e}")
+        return False
+
+    if (app_key, app_secret) == (VMS_APP_KEY, VMS_APP_SECRET):
+        return True
+
+    context = SigningContext(app_key, app_secret, ARTEMIS_HOST) if app_key and app_secret else None
+    with _signing_context_lock:
+        VMS_APP_KEY, VMS_APP_SECRET = app_key, app_secret
+        _signing_context = context
+    if context is None:
+        logger.warning(f"VMS credentials removed from {path}; VMS calls will fail until they are set.")
+    else:
+        logger.warning(f"VMS credentials reloaded from {path} (key ...{app_key[-4:]}).")
+    return True
+
+
+class SignatureService:
+
+    @staticmethod
+    def generate_signature(method, api_path, body):
+        # The returned dict is shared with the memo cache; callers must not mutate it
+        return get_signing_context().sign(method, api_path, body)
@@ -0,0 +1,40 @@
+# backend/services/singleflight.py
+
+import asyncio
+
+
+class SingleFlight:
+    """Coalesces concurrent identical calls into one in-flight call.
+
+    The first caller for a key starts the work as a task; callers arriving
+    while it runs await the same task and receive the same result (or
+    exception). The key is forgotten as soon as the task finishes, so this
+    never serves old results - it only removes duplicate concurrent work.
+    """
+
+    def __init__(self):
+        self._calls = {} # key -> asyncio.Task
+        self.calls = 0
+        self.shared = 0
+
+    async def do(self, key, fn):
+        task = self._calls.get(key)
+        if task is None:
+            self.calls += 1
+            # Run as a task so one cancelled waiter (client disconnect) doesn't cancel it for the others
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda t, key=key: self._done(key, t))
+        else:
+            self.shared += 1
+        return await asyncio.shield(task)
+
+    def _done(self, key, task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Mark the exception as retrieved in case every waiter was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    def in_flight(self):
+        return len(self._calls)
@@ -0,0 +1,313 @@
+# backend/services/site_service.py
+
+import asyncio
+import logging
+import os
+import threading
+
+from fastapi import HTTPException, status
+
+from app.backend.config import settings
+from app.backend.services.artemis_client import ArtemisClient
+from app.backend.services.config_service import config_file, read_json_file
+from app.backend.services.metrics_service import register_collector
+from app.backend.services.signature_service import SigningContext, get_signing_context
+from app.backend.services.upstream_limiter import UpstreamBusyError
+
+logger = logging.getLogger(__name__)
+
+# Optional, next to the executable. Without it there is one site, "default",
+# at ARTEMIS_HOST with the vms_keys.json credentials. Example:
+#   {"default": "north",
+#    "sites": {"north": {"host": "https://10.1.0.10:443", "partner_key": "...", "partner_secret": "..."},
+#              "south": {"host": "https://10.2.0.10:443"}}}
+# A site without its own keys signs with vms_keys.json.
+SITES_FILE = "artemis_sites.json"
+DEFAULT_SITE = "default"
+
+# Accepted by the list endpoints' ?site= to fan out to every site
+ALL_SITES = ("all", "*")
+
+
+class Site:
+    """One Artemis platform: its host, credentials and its own connection pool."""
+
+    def __init__(self, name, host, app_key="", app_secret=""):
+        self.name = name
+        self.host = host
+        self.client = ArtemisClient(host, signing_context=self.signing_context)
+        self._context = None
+        self.set_credentials(app_key, app_secret)
+
+    def set_credentials(self, app_key, app_secret):
+        """Swaps the site's signing context; the connection pool is kept."""
+        self.app_key = app_key
+        self.credentials = (app_key, app_secret)
+        self._context = SigningContext(app_key, app_secret, self.host) if app_key and app_secret else None
+
+    def signing_context(self):
+        context = self._context
+        return context if context is not None else get_signing_context()
+
+
+def _site_credentials(spec):
+    for key_field, secret_field in (("app_key", "app_secret"), ("APP_KEY", "APP_SECRET"),
+                                    ("partner_key", "partner_secret")):
+        if spec.get(key_field) or spec.get(secret_field):
+            return str(spec.get(key_field) or ""), str(spec.get(secret_field) or "")
+    return "", ""
+
+
+def parse_sites(config):
+    """Returns (default name, {name: (host, key, secret)}) from a sites file. Raises ValueError if invalid."""
+    if not isinstance(config, dict) or not isinstance(config.get("sites"), dict) or not config["sites"]:
+        raise ValueError('expected {"sites": {"<name>": {"host": ...}, ...}}')
+    sites = {}
+    for name, spec in config["sites"].items():
+        if not isinstance(spec, dict) or not spec.get("host"):
+            raise ValueError(f"site '{name}' needs a host")
+        if str(name).lower() in ALL_SITES:
+            raise ValueError(f"'{name}' is reserved")
+        sites[str(name)] = (str(spec["host"]).rstrip("/"), *_site_credentials(spec))
+    default = str(config.get("default") or next(iter(sites)))
+    if default not in sites:
+        raise ValueError(f"default site '{default}' is not defined")
+    return default, sites
+
+
+class SiteRegistry:
+    """The configured sites. Reloading keeps the pool of every site whose host is unchanged."""
+
+    def __init__(self):
+        self.default = DEFAULT_SITE
+        self.sites = {DEFAULT_SITE: Site(DEFAULT_SITE, settings.ARTEMIS_HOST)}
+
+    def load(self, path):
+        """Applies a sites file. Returns False (keeping the current sites) if it can't be parsed."""
+        try:
+            default, specs = parse_sites(read_json_file(path))
+        except FileNotFoundError:
+            default, specs = DEFAULT_SITE, {DEFAULT_SITE: (settings.ARTEMIS_HOST, "", "")}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Keeping current Artemis sites; could not read {path}: {e}")
+            return False
+
+        sites, retired, changed = {}, [], []
+        for name, (host, app_key, app_secret) in specs.items():
+            site = self.sites.get(name)
+            if site is not None and site.host == host:
+                if site.credentials != (app_key, app_secret):
+                    changed.append(name)
+                site.set_credentials(app_key, app_secret)
+            else:
+                if site is not None:
+                    retired.append(site)
+                    changed.append(name)
+                site = Site(name, host, app_key, app_secret)
+            sites[name] = site
+        removed = [name for name in self.sites if name not in sites]
+        retired.extend(self.sites[name] for name in removed)
+
+        # Swap in one assignment each; requests already holding a Site keep using it
+        self.sites, self.default = sites, default
+        for site in retired:
+            _close_later(site.client)
+        if changed or removed:
+            _notify_sites_changed(changed, removed)
+        return True
+
+    def get(self, name=None):
+        """The named site (the default one if name is empty). Raises 404 for unknown names."""
+        site = self.sites.get(name or self.default)
+        if site is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Unknown Artemis site '{name}'. Configured sites: {', '.join(self.sites)}"
+            )
+        return site
+
+    def select(self, site_param):
+        """Resolves a ?site= value: empty -> [default], "all" -> every site, "a,b" -> those sites."""
+        if not site_param:
+            return [self.get()]
+        if site_param.lower() in ALL_SITES:
+            return list(self.sites.values())
+        # dict.fromkeys: "?site=a,a" asks for site a once
+        names = dict.fromkeys(name.strip() for name in site_param.split(",") if name.strip())
+        return [self.get(name) for name in names] or [self.get()]
+
+
+def _retire_grace():
+    """Longest a call already admitted to a retired site can still be running."""
+    deadline = settings.ARTEMIS_REQUEST_DEADLINE or settings.ARTEMIS_CONNECT_TIMEOUT + settings.ARTEMIS_READ_TIMEOUT
+    return settings.ARTEMIS_QUEUE_TIMEOUT + deadline
+
+
+def _close_later(client):
+    """Closes a retired site's pool after the calls still holding it have finished."""
+    try:
+        task = asyncio.get_running_loop().create_task(client.drain_and_close(_retire_grace()))
+    except RuntimeError:
+        # No loop (e.g. reloaded at import); the pool is released when collected
+        return
+    _background.add(task)
+    task.add_done_callback(_finish_background)
+
+
+# Callbacks (changed names, removed names) run after a reload, so per-site caches
+# never serve another platform's data under the same site name
+_change_listeners = []
+
+
+def on_sites_changed(callback):
+    _change_listeners.append(callback)
+
+
+def _notify_sites_changed(changed, removed):
+    for callback in list(_change_listeners):
+        try:
+            callback(changed, removed)
+        except Exception as e:
+            logger.warning(f"Artemis site change handler failed: {e}")
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_sites():
+    """Returns the process-wide SiteRegistry, loading the sites file on first use."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                registry = SiteRegistry()
+                if os.path.exists(config_file(SITES_FILE)):
+                    registry.load(config_file(SITES_FILE))
+                _registry = registry
+    return _registry
+
+
+def wants_fan_out(site_param):
+    """True when a ?site= value asks for merged results from several sites."""
+    return bool(site_param) and (site_param.lower() in ALL_SITES or "," in site_param)
+
+
+def get_site(name=None):
+    return get_sites().get(name)
+
+
+def get_artemis_client(site=None):
+    """Returns the ArtemisClient of a site (the default site if none is given)."""
+    return get_sites().get(site).client
+
+
+def reload_sites(path=None):
+    """Config watcher callback for the sites file."""
+    ok = get_sites().load(path or config_file(SITES_FILE))
+    if ok:
+        logger.warning(f"Artemis sites loaded: {', '.join(get_sites().sites)} (default {get_sites().default})")
+    return ok
+
+
+async def fan_out(sites, fetch, timeout=None):
+    """Runs fetch(site) for every site concurrently and waits up to timeout seconds.
+
+    Returns {site name: ("ok", result) | ("error", exception) | ("timeout", None)}.
+    A slow site's call is left running in the background (so e.g. its cache
+    still fills) rather than holding up the answer from the others.
+    """
+    timeout = settings.SITE_FANOUT_TIMEOUT if timeout is None else timeout
+    tasks = {site.name: asyncio.ensure_future(fetch(site)) for site in sites}
+    done, pending = await asyncio.wait(tasks.values(), timeout=timeout if timeout > 0 else None)
+
+    results = {}
+    for name, task in tasks.items():
+        if task in pending:
+            results[name] = ("timeout", None)
+            _background.add(task)
+            task.add_done_callback(_finish_background)
+        elif task.exception() is not None:
+            results[name] = ("error", task.exception())
+        else:
+            results[name] = ("ok", task.result())
+    return results
+
+
+# Strong references to fan-out calls that outlived their request
+_background = set()
+
+
+def _finish_background(task):
+    _background.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning(f"Background Artemis site call failed: {task.exception()}")
+
+
+def _error_detail(error):
+    return getattr(error, "detail", None) or str(error) or type(error).__name__
+
+
+def site_status(results):
+    """The per-site summary returned alongside fan-out results."""
+    return {
+        name: {"status": state} if state != "error" else {"status": state, "detail": _error_detail(value)}
+        for name, (state, value) in results.items()
+    }
+
+
+def raise_all_failed(results):
+    """Raises for a fan-out where no site answered.
+
+    If our own limiter refused every site, the UpstreamBusyError (with the
+    longest Retry-After) is re-raised so the caller still gets 503 + Retry-After;
+    otherwise it's a 500 listing each site's failure.
+    """
+    busy = [value for state, value in results.values() if state == "error" and isinstance(value, UpstreamBusyError)]
+    if busy and len(busy) == len(results):
+        raise max(busy, key=lambda error: error.retry_after)
+    raise HTTPException(
+        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        detail=f"VMS API Request Failed on every site: {site_status(results)}"
+    )
+
+
+def _collect_pool_metrics():
+    if _registry is None:
+        return []
+    pool_samples, max_samples, calls, shared = [], [], [], []
+    for name, site in list(_registry.sites.items()):
+        stats = site.client.pool_stats()
+        pool_samples += [({"site": name, "state": state}, stats[state]) for state in ("active", "idle")]
+        max_samples.append(({"site": name}, stats["max"]))
+        calls.append(({"site": name}, site.client.singleflight.calls))
+        shared.append(({"site": name}, site.client.singleflight.shared))
+    return [
+        ("vms_upstream_pool_connections", "gauge", "Artemis pool connections by state", pool_samples),
+        ("vms_upstream_pool_max_connections", "gauge", "Artemis pool connection limit", max_samples),
+        ("vms_upstream_coalesced_calls_total", "counter", "Coalescable Artemis reads requested", calls),
+        ("vms_upstream_coalesced_shared_total", "counter", "Artemis reads served by joining an in-flight call", shared),
+    ]
+
+
+register_collector(_collect_pool_metrics)
+
+
+def _reset_after_fork():
+    """A forked worker must never reuse the parent's sockets or lock."""
+    global _registry, _registry_lock
+    _registry = None
+    _registry_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+async def close_artemis_clients():
+    """Closes every site's pooled connections on shutdown."""
+    global _registry
+    if _registry is not None:
+        registry, _registry = _registry, None
+        for site in registry.sites.values():
+            await site.client.aclose()
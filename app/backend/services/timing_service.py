@@ -0,0 +1,121 @@
+# backend/services/timing_service.py
+
+import contextvars
+import time
+from contextlib import contextmanager
+
+# Phase name -> Server-Timing description, in header order
+PHASES = {
+    "auth": "JWT verification",
+    "sign": "Artemis signature",
+    "queue": "Upstream admission wait",
+    "connect": "Upstream connect",
+    "ttfb": "Upstream time to first byte",
+    "parse": "VMS body parse",
+    "serialize": "Response serialization",
+}
+
+# Per-request phase spans: phase -> [(start, end), ...] in perf_counter seconds.
+# None outside a timed request, so the helpers below cost one ContextVar lookup
+# when Server-Timing is off. Tasks spawned by the request (gathered door pages,
+# fan-out sites) share the same dict, so their spans can overlap.
+_phases = contextvars.ContextVar("server_timing_phases", default=None)
+
+
+def start_request():
+    """Begins collecting phases for the current request; pass the token to end_request()."""
+    return _phases.set({})
+
+
+def end_request(token):
+    _phases.reset(token)
+
+
+def current_phases():
+    return _phases.get()
+
+
+def add(phase, seconds, end=None):
+    """Records one span of a phase lasting `seconds` and ending at `end` (default now)."""
+    phases = _phases.get()
+    if phases is not None:
+        end = time.perf_counter() if end is None else end
+        phases.setdefault(phase, []).append((end - seconds, end))
+
+
+@contextmanager
+def timed(phase):
+    phases = _phases.get()
+    if phases is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        phases.setdefault(phase, []).append((start, time.perf_counter()))
+
+
+def wall_time(spans):
+    """Seconds covered by the union of spans: overlapping calls (e.g. door pages
+    fetched concurrently) count once, so a phase never exceeds the request total."""
+    covered = 0.0
+    current_start = current_end = None
+    for start, end in sorted(spans):
+        if current_end is None or start > current_end:
+            if current_end is not None:
+                covered += current_end - current_start
+            current_start, current_end = start, end
+        else:
+            current_end = max(current_end, end)
+    if current_end is not None:
+        covered += current_end - current_start
+    return covered
+
+
+class UpstreamTrace:
+    """httpx "trace" extension callback splitting an upstream call into connect and TTFB.
+
+    connect covers TCP connect plus TLS handshake (zero on a reused pooled
+    connection); ttfb runs from sending the request headers to receiving the
+    response headers.
+    """
+
+    def __init__(self):
+        self._started = {}
+
+    async def __call__(self, event_name, info):
+        # e.g. "connection.connect_tcp.started", "http11.receive_response_headers.complete"
+        name, _, stage = event_name.rpartition(".")
+        step = name.rpartition(".")[2]
+        now = time.perf_counter()
+        if stage == "started":
+            self._started[step] = now
+        elif stage == "complete":
+            if step in ("connect_tcp", "start_tls") and step in self._started:
+                add("connect", now - self._started.pop(step), now)
+            elif step == "receive_response_headers" and "send_request_headers" in self._started:
+                add("ttfb", now - self._started.pop("send_request_headers"), now)
+
+
+def upstream_trace():
+    """Returns httpx request extensions for timing, or None when no request is being timed."""
+    if _phases.get() is None:
+        return None
+    return {"trace": UpstreamTrace()}
+
+
+def header_value(phases, total=None):
+    """Formats phases as a Server-Timing header value: wall-clock milliseconds per
+    phase, with the number of calls when a phase ran more than once."""
+    entries = []
+    for name, description in PHASES.items():
+        spans = phases.get(name)
+        if not spans:
+            continue
+        if len(spans) > 1:
+            description = f"{description} ({len(spans)} calls)"
+        entries.append(f'{name};dur={wall_time(spans) * 1000:.2f};desc="{description}"')
+    if total is not None:
+        entries.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(entries)
@@ -0,0 +1,176 @@
+# backend/services/upstream_limiter.py
+
+import asyncio
+import math
+import time
+from contextlib import asynccontextmanager
+
+from app.backend.config import settings
+from app.backend.services import timing_service
+from app.backend.services.metrics_service import UPSTREAM_REJECTED
+
+
+class UpstreamBusyError(Exception):
+    """Raised when an Artemis call can't be admitted before its queue deadline (served as 503)."""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = max(int(math.ceil(retry_after)), 1) # whole seconds for Retry-After
+
+
+class TokenBucket:
+    """Requests/sec limit with bursts. Single event loop only; no locking needed."""
+
+    def __init__(self, rate, burst):
+        self.rate = float(rate)
+        self.burst = max(float(burst), 1.0)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    def reserve(self, max_wait):
+        """Takes a token and returns how long to wait before using it.
+
+        If the wait would exceed max_wait nothing is taken and the (negative)
+        wait is returned instead, so the caller can put it in Retry-After.
+        """
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+        wait = (1.0 - self.tokens) / self.rate if self.tokens < 1.0 else 0.0
+        if wait > max_wait:
+            return -wait
+        # Tokens may go negative: later callers queue behind this reservation
+        self.tokens -= 1.0
+        return wait
+
+    def refund(self):
+        self.tokens = min(self.burst, self.tokens + 1.0)
+
+
+class _Quota:
+
+    def __init__(self, max_in_flight=0, rate=0.0, burst=0):
+        self.semaphore = asyncio.Semaphore(max_in_flight) if max_in_flight > 0 else None
+        self.bucket = TokenBucket(rate, burst or max(rate, 1.0)) if rate > 0 else None
+
+
+def parse_endpoint_limits(spec):
+    """Parses "path=max_in_flight:rate,..." into {path: (max_in_flight, rate)}.
+
+    Either number may be left empty ("/api/visitor/v1/appointment=:5" limits
+    only the rate). Raises ValueError on a malformed entry.
+    """
+    limits = {}
+    for entry in filter(None, (item.strip() for item in spec.split(","))):
+        path, sep, values = entry.partition("=")
+        if not sep or not path.startswith("/"):
+            raise ValueError(f"Invalid endpoint limit '{entry}'. Use path=max_in_flight:rate")
+        in_flight, _, rate = values.partition(":")
+        try:
+            limits[path.strip()] = (int(in_flight or 0), float(rate or 0))
+        except ValueError:
+            raise ValueError(f"Invalid endpoint limit '{entry}'. Use path=max_in_flight:rate")
+    return limits
+
+
+class UpstreamLimiter:
+    """Admission control in front of Artemis: a global in-flight cap and token
+    bucket, plus optional per-endpoint quotas.
+
+    A call that can't be admitted straight away waits up to queue_timeout;
+    if it still can't go (or the rate limit alone would make it wait longer)
+    it fails fast with UpstreamBusyError instead of piling onto the VMS.
+    """
+
+    def __init__(self, max_in_flight=0, rate=0.0, burst=0, endpoint_limits=None, queue_timeout=2.0):
+        self.queue_timeout = queue_timeout
+        self._global = _Quota(max_in_flight, rate, burst)
+        self._endpoints = {
+            path: _Quota(path_in_flight, path_rate)
+            for path, (path_in_flight, path_rate) in (endpoint_limits or {}).items()
+        }
+        self.enabled = (
+            self._global.semaphore is not None or self._global.bucket is not None or bool(self._endpoints)
+        )
+
+    @classmethod
+    def from_settings(cls):
+        return cls(
+            max_in_flight=settings.ARTEMIS_MAX_IN_FLIGHT,
+            rate=settings.ARTEMIS_RATE_LIMIT,
+            burst=settings.ARTEMIS_RATE_BURST,
+            endpoint_limits=parse_endpoint_limits(settings.ARTEMIS_ENDPOINT_LIMITS),
+            queue_timeout=settings.ARTEMIS_QUEUE_TIMEOUT,
+        )
+
+    def _quotas(self, short_path):
+        quota = self._endpoints.get(short_path)
+        return (self._global, quota) if quota is not None else (self._global,)
+
+    def _reject(self, short_path, reason, retry_after):
+        UPSTREAM_REJECTED.inc((short_path, reason))
+        raise UpstreamBusyError(
+            f"VMS is busy ({reason}); request to {short_path} was not sent. Retry shortly.", retry_after
+        )
+
+    @asynccontextmanager
+    async def slot(self, short_path):
+        """Holds one admitted upstream call for the duration of the block."""
+        if not self.enabled:
+            yield
+            return
+
+        start = time.monotonic()
+        deadline = start + self.queue_timeout
+        quotas = self._quotas(short_path)
+
+        # 1. Rate: reserve a token from every bucket that applies, or give them all back
+        reserved = []
+        wait = 0.0
+        for quota in quotas:
+            if quota.bucket is None:
+                continue
+            token_wait = quota.bucket.reserve(deadline - start)
+            if token_wait < 0:
+                for bucket in reserved:
+                    bucket.refund()
+                self._reject(short_path, "rate", -token_wait)
+            reserved.append(quota.bucket)
+            wait = max(wait, token_wait)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+        # 2. Concurrency: wait for a free slot until the deadline
+        acquired = []
+        try:
+            for quota in quotas:
+                semaphore = quota.semaphore
+                if semaphore is None:
+                    continue
+                if semaphore.locked():
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._reject(short_path, "in_flight", self.queue_timeout)
+                    try:
+                        await asyncio.wait_for(semaphore.acquire(), remaining)
+                    except asyncio.TimeoutError:
+                        self._reject(short_path, "in_flight", self.queue_timeout)
+                else:
+                    await semaphore.acquire()
+                acquired.append(semaphore)
+        except BaseException:
+            for semaphore in acquired:
+                semaphore.release()
+            # The call never goes out: give back its rate tokens so rejections
+            # under overload don't also use up the per-second budget
+            for bucket in reserved:
+                bucket.refund()
+            raise
+
+        timing_service.add("queue", time.monotonic() - start)
+        try:
+            yield
+        finally:
+            for semaphore in acquired:
+                semaphore.release()
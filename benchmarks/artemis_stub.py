@@ -0,0 +1,239 @@
+"""Local stand-in for a Hikvision Artemis gateway, for load tests without a VMS box.
+
+Verifies Content-MD5 and X-Ca-Signature the way the gateway does, serves
+generated door/visitor datasets with pagination, and can inject latency and
+errors. Point the service at it with ARTEMIS_HOST=http://127.0.0.1:<port>.
+Unlike app/backend/controllers/version_check.py (one hard-coded signed call),
+this lets the whole service be load tested.
+
+Run from the project root:
+    python benchmarks/artemis_stub.py --port 9443 --doors 1000 --visitors 5000 \
+        --latency-ms 20 --jitter-ms 5 --error-rate 0.01
+"""
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import random
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.responses import Response
+from starlette.routing import Route
+
+DEFAULT_APP_KEY = "12345678"
+DEFAULT_APP_SECRET = "stub_secret_0123456789"
+
+DOOR_PATHS = ("/api/resource/v1/acsDoor/advance/acsDoorList", "/api/resource/v1/acsDoor/acsDoorList")
+VISITOR_PATH = "/api/visitor/v1/visitor/visitorInfo"
+APPOINTMENT_PATH = "/api/visitor/v1/appointment"
+# Called by app/backend/controllers/version_check.py
+VERSION_PATH = "/api/common/v1/version"
+
+# Error kinds for --error-kinds: HTTP 500, a VMS error code in a 200, or a hang past the client timeout
+ERROR_KINDS = ("http", "code", "hang")
+
+
+def make_doors(count):
+    return [
+        {
+            "doorIndexCode": str(1000 + i),
+            "doorName": f"Door {i + 1:04d}",
+            "doorNo": str(i % 4 + 1),
+            "doorSerial": i % 4 + 1,
+            "acsDevIndexCode": str(100 + i // 4),
+            "regionIndexCode": f"region-{i // 50:03d}",
+            "channelType": "door",
+        }
+        for i in range(count)
+    ]
+
+
+def make_visitors(count):
+    return [
+        {
+            "visitorId": f"v{i:06d}",
+            "visitorName": f"Visitor {i}",
+            "visitorGivenName": f"Given{i}",
+            "visitorFamilyName": f"Family{i}",
+            "gender": i % 2 + 1,
+            "phoneNo": f"0400{i:06d}",
+            "visitStartTime": "2024-01-01T08:00:00+08:00",
+            "visitEndTime": "2024-01-01T18:00:00+08:00",
+            "appointStatus": 1,
+        }
+        for i in range(count)
+    ]
+
+
+def string_to_sign(method, headers, path):
+    """Rebuilds the gateway's string-to-sign from the received request.
+
+    METHOD, then Accept, Content-MD5, Content-Type and Date (each only when
+    present), then the headers named in X-Ca-Signature-Headers as sorted
+    "name:value" lines, then the signed path (/artemis + the request path).
+    """
+    lines = [method]
+    for name in ("accept", "content-md5", "content-type", "date"):
+        value = headers.get(name)
+        if value is not None:
+            lines.append(value)
+    signed = sorted(h.strip().lower() for h in headers.get("x-ca-signature-headers", "").split(",") if h.strip())
+    for name in signed:
+        lines.append(f"{name}:{headers.get(name, '')}")
+    lines.append(path if path.startswith("/artemis") else "/artemis" + path)
+    return "\n".join(lines)
+
+
+def verify_signature(method, path, headers, body, app_key, app_secret):
+    """Returns None if the request is correctly signed, else the reason it was rejected."""
+    if headers.get("x-ca-key") != app_key:
+        return "unknown X-Ca-Key"
+    content_md5 = headers.get("content-md5")
+    if content_md5 is not None:
+        expected_md5 = base64.b64encode(hashlib.md5(body).digest()).decode("utf-8")
+        if content_md5 != expected_md5:
+            return "Content-MD5 does not match the body"
+    mac = hmac.new(app_secret.encode("utf-8"), string_to_sign(method, headers, path).encode("utf-8"), hashlib.sha256)
+    expected = base64.b64encode(mac.digest()).decode("utf-8")
+    if not hmac.compare_digest(expected, headers.get("x-ca-signature", "")):
+        return "X-Ca-Signature does not match"
+    return None
+
+
+def _json(content, status_code=200):
+    return Response(json.dumps(content, separators=(",", ":")), status_code=status_code, media_type="application/json")
+
+
+def _page(items, body, default_size):
+    try:
+        page_no = max(int(body.get("pageNo", 1)), 1)
+        page_size = max(int(body.get("pageSize", default_size)), 1)
+    except (TypeError, ValueError):
+        return None
+    start = (page_no - 1) * page_size
+    return {"total": len(items), "pageNo": page_no, "pageSize": page_size, "list": items[start:start + page_size]}
+
+
+class ArtemisStub:
+    """The stub's datasets, fault settings and request counters."""
+
+    def __init__(self, app_key=DEFAULT_APP_KEY, app_secret=DEFAULT_APP_SECRET, doors=500, visitors=2000,
+                 latency_ms=0.0, jitter_ms=0.0, error_rate=0.0, error_kinds=ERROR_KINDS, hang_seconds=60.0,
+                 disable_advance=False, seed=None):
+        self.app_key = app_key
+        self.app_secret = app_secret
+        self.doors = make_doors(doors)
+        self.visitors = make_visitors(visitors)
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.error_rate = error_rate
+        self.error_kinds = tuple(error_kinds)
+        self.hang_seconds = hang_seconds
+        self.disable_advance = disable_advance
+        self.random = random.Random(seed)
+        self.counters = {"requests": 0, "rejected": 0, "injected_errors": 0}
+        self.appointments = 0
+
+    async def handle(self, request):
+        self.counters["requests"] += 1
+        path = request.url.path
+        body = await request.body()
+
+        reason = verify_signature(request.method, path, request.headers, body, self.app_key, self.app_secret)
+        if reason is not None:
+            self.counters["rejected"] += 1
+            return _json({"code": "401", "msg": f"Signature verification failed: {reason}"}, status_code=401)
+
+        delay = self.latency + (self.random.uniform(-self.jitter, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        if self.error_rate and self.random.random() < self.error_rate:
+            self.counters["injected_errors"] += 1
+            kind = self.random.choice(self.error_kinds)
+            if kind == "hang":
+                await asyncio.sleep(self.hang_seconds)
+            if kind == "code":
+                return _json({"code": "0x00052101", "msg": "Injected VMS error"})
+            return _json({"code": "500", "msg": "Injected server error"}, status_code=500)
+
+        short_path = path[len("/artemis"):] if path.startswith("/artemis") else path
+        try:
+            payload = json.loads(body or b"{}")
+        except ValueError:
+            return _json({"code": "0x00052102", "msg": "Invalid JSON body"})
+
+        if short_path in DOOR_PATHS:
+            if self.disable_advance and "advance" in short_path:
+                return _json({"code": "404", "msg": "Not found"}, status_code=404)
+            data = _page(self.doors, payload, 200)
+        elif short_path == VISITOR_PATH:
+            data = _page(self.visitors, payload, 100)
+        elif short_path == VERSION_PATH:
+            data = {"productName": "Artemis stub", "softVersion": "V0.0.0"}
+        elif short_path == APPOINTMENT_PATH:
+            self.appointments += 1
+            data = {"appointRecordId": str(self.appointments), "orderId": f"stub-{self.appointments}"}
+        else:
+            return _json({"code": "404", "msg": f"Unknown API {short_path}"}, status_code=404)
+
+        if data is None:
+            return _json({"code": "0x00052102", "msg": "Invalid pageNo/pageSize"})
+        return _json({"code": "0", "msg": "Success", "data": data})
+
+    async def stats(self, request):
+        return _json(dict(self.counters, appointments=self.appointments))
+
+    def app(self):
+        return Starlette(routes=[
+            Route("/_stub/stats", self.stats, methods=["GET"]),
+            Route("/{path:path}", self.handle, methods=["POST"]),
+        ])
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9443)
+    parser.add_argument("--app-key", default=DEFAULT_APP_KEY)
+    parser.add_argument("--app-secret", default=DEFAULT_APP_SECRET)
+    parser.add_argument("--doors", type=int, default=500, help="number of doors in the dataset")
+    parser.add_argument("--visitors", type=int, default=2000, help="number of visitors in the dataset")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="added latency per request")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="+/- random jitter on the latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests that fail (0-1)")
+    parser.add_argument("--error-kinds", default=",".join(ERROR_KINDS),
+                        help=f"comma-separated failure kinds to draw from: {', '.join(ERROR_KINDS)}")
+    parser.add_argument("--hang-seconds", type=float, default=60.0, help="how long a 'hang' error stalls")
+    parser.add_argument("--disable-advance", action="store_true",
+                        help="404 the advance door API so the service falls back to the basic one")
+    parser.add_argument("--seed", type=int, default=None)
+    return parser
+
+
+def stub_from_args(args):
+    kinds = [kind.strip() for kind in args.error_kinds.split(",") if kind.strip()]
+    unknown = set(kinds) - set(ERROR_KINDS)
+    if unknown:
+        raise SystemExit(f"Unknown error kinds: {', '.join(sorted(unknown))}")
+    return ArtemisStub(
+        app_key=args.app_key, app_secret=args.app_secret, doors=args.doors, visitors=args.visitors,
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate, error_kinds=kinds,
+        hang_seconds=args.hang_seconds, disable_advance=args.disable_advance, seed=args.seed,
+    )
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    stub = stub_from_args(args)
+    print(f"Artemis stub on http://{args.host}:{args.port} (key {args.app_key}, "
+          f"{len(stub.doors)} doors, {len(stub.visitors)} visitors)")
+    uvicorn.run(stub.app(), host=args.host, port=args.port, log_level="warning", access_log=False)
+
+
+if __name__ == "__main__":
+    main()
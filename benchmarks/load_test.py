@@ -0,0 +1,284 @@
+"""Load test: drives the service against the local Artemis stub and reports RPS and latency percentiles.
+
+Starts benchmarks/artemis_stub.py and the FastAPI app (uvicorn) as subprocesses,
+logs in once, then runs each scenario for a fixed duration at a fixed
+concurrency (closed loop) and reports RPS and p50/p95/p99 per endpoint.
+
+Run from the project root:
+    python benchmarks/load_test.py --duration 10 --concurrency 32
+    python benchmarks/load_test.py --scenarios doors,visitors --workers 4 --latency-ms 20 --json results.json
+    python benchmarks/load_test.py --service-env DOOR_CACHE_TTL=0 --scenarios doors
+
+Use --service-url / --artemis-url to run against servers you started yourself.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.artemis_stub import DEFAULT_APP_KEY, DEFAULT_APP_SECRET
+
+USERNAME = "vms_admin"
+PASSWORD = "vms_secret"
+
+
+def _appointment(i):
+    return {
+        "receptionistId": "1",
+        "visitStartTime": "2024-01-01T08:00:00+08:00",
+        "visitEndTime": "2024-01-01T18:00:00+08:00",
+        "visitPurposeType": 0,
+        "visitorInfoList": [{"VisitorInfo": {"visitorFamilyName": "Load", "visitorGivenName": f"Test{i}", "gender": 1}}],
+    }
+
+
+# name -> (path, body builder taking the request number)
+SCENARIOS = {
+    "doors": ("/api/doors/door/linked", lambda i: None),
+    "visitors": ("/api/visitors/visitor/list", lambda i: {"pageNo": 1, "pageSize": 100}),
+    # Different pages, so the visitor cache and request coalescing help less
+    "visitors-paged": ("/api/visitors/visitor/list", lambda i: {"pageNo": i % 20 + 1, "pageSize": 100}),
+    "register": ("/api/register/visitor/register", _appointment),
+}
+DEFAULT_SCENARIOS = ("doors", "visitors", "register")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_until_up(url, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(url, timeout=1.0)
+            return
+        except httpx.TransportError:
+            time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout:.0f}s")
+
+
+def start_stub(args, port):
+    command = [
+        sys.executable, os.path.join(ROOT, "benchmarks", "artemis_stub.py"), "--port", str(port),
+        "--doors", str(args.doors), "--visitors", str(args.visitors),
+        "--latency-ms", str(args.latency_ms), "--jitter-ms", str(args.jitter_ms),
+        "--error-rate", str(args.error_rate), "--error-kinds", args.error_kinds,
+    ]
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL)
+    wait_until_up(f"http://127.0.0.1:{port}/_stub/stats")
+    return process
+
+
+def start_service(args, port, artemis_url, workdir):
+    # The service reads its VMS credentials from vms_keys.json in VMS_CONFIG_DIR
+    with open(os.path.join(workdir, "vms_keys.json"), "w") as f:
+        json.dump({"APP_KEY": DEFAULT_APP_KEY, "APP_SECRET": DEFAULT_APP_SECRET}, f)
+
+    env = dict(os.environ, ARTEMIS_HOST=artemis_url, VMS_CONFIG_DIR=workdir, PYTHONPATH=ROOT)
+    for item in args.service_env:
+        key, _, value = item.partition("=")
+        env[key] = value
+
+    command = [
+        sys.executable, "-m", "uvicorn", "app:app", "--host", "127.0.0.1", "--port", str(port),
+        "--workers", str(args.workers), "--log-level", "warning", "--no-access-log",
+    ]
+    process = subprocess.Popen(command, cwd=workdir, env=env, stdout=subprocess.DEVNULL)
+    wait_until_up(f"http://127.0.0.1:{port}/docs")
+    return process
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(math.ceil(pct / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+async def _drive(base_url, token, scenario, concurrency, duration, warmup, offset):
+    path, build_body = SCENARIOS[scenario]
+    headers = {"Authorization": f"Bearer {token}", "Accept-Encoding": "gzip"}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    latencies = []
+    statuses = {}
+    counter = iter(range(offset, sys.maxsize))
+
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, limits=limits, timeout=60.0) as client:
+        async def worker(until, record):
+            while time.perf_counter() < until:
+                body = build_body(next(counter))
+                start = time.perf_counter()
+                try:
+                    response = await client.post(path, json=body)
+                    status_code = str(response.status_code)
+                except httpx.HTTPError as e:
+                    status_code = type(e).__name__
+                if record:
+                    latencies.append(time.perf_counter() - start)
+                    statuses[status_code] = statuses.get(status_code, 0) + 1
+
+        if warmup > 0:
+            until = time.perf_counter() + warmup
+            await asyncio.gather(*(worker(until, False) for _ in range(concurrency)))
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(start + duration, True) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    return latencies, statuses, elapsed
+
+
+def _drive_process(base_url, token, scenario, concurrency, duration, warmup, offset):
+    return asyncio.run(_drive(base_url, token, scenario, concurrency, duration, warmup, offset))
+
+
+def run_scenario(base_url, token, scenario, args):
+    """Runs one scenario (optionally split across load-generator processes) and summarises it."""
+    processes = max(args.processes, 1)
+    per_process = max(args.concurrency // processes, 1)
+    if processes == 1:
+        results = [_drive_process(base_url, token, scenario, per_process, args.duration, args.warmup, 0)]
+    else:
+        with ProcessPoolExecutor(processes) as pool:
+            futures = [
+                pool.submit(_drive_process, base_url, token, scenario, per_process, args.duration, args.warmup,
+                            n * 1_000_000)
+                for n in range(processes)
+            ]
+            results = [future.result() for future in futures]
+
+    latencies = sorted(latency for result in results for latency in result[0])
+    statuses = {}
+    for _, process_statuses, _ in results:
+        for status_code, count in process_statuses.items():
+            statuses[status_code] = statuses.get(status_code, 0) + count
+    elapsed = max(result[2] for result in results)
+
+    def ms(value):
+        return round(value * 1000, 3) if value is not None else None
+
+    return {
+        "scenario": scenario,
+        "path": SCENARIOS[scenario][0],
+        "concurrency": per_process * processes,
+        "duration_s": round(elapsed, 3),
+        "requests": len(latencies),
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "errors": sum(count for status_code, count in statuses.items() if status_code != "200"),
+        "statuses": statuses,
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p95_ms": ms(percentile(latencies, 95)),
+        "p99_ms": ms(percentile(latencies, 99)),
+        "max_ms": ms(latencies[-1] if latencies else None),
+    }
+
+
+def print_table(results, out=sys.stdout):
+    print(f"{'scenario':<16}{'requests':>10}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}", file=out)
+    for r in results:
+        print(f"{r['scenario']:<16}{r['requests']:>10}{r['rps']:>10.1f}"
+              f"{r['p50_ms'] or 0:>10.2f}{r['p95_ms'] or 0:>10.2f}{r['p99_ms'] or 0:>10.2f}{r['errors']:>8}", file=out)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", default=",".join(DEFAULT_SCENARIOS),
+                        help=f"comma-separated, from: {', '.join(SCENARIOS)}")
+    parser.add_argument("--duration", type=float, default=10.0, help="measured seconds per scenario")
+    parser.add_argument("--warmup", type=float, default=2.0, help="unmeasured seconds before each scenario")
+    parser.add_argument("--concurrency", type=int, default=32, help="requests in flight")
+    parser.add_argument("--processes", type=int, default=1, help="load-generator processes sharing the concurrency")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for the service")
+    parser.add_argument("--service-env", action="append", default=[], metavar="KEY=VALUE",
+                        help="extra environment for the service, e.g. DOOR_CACHE_TTL=0 (repeatable)")
+    parser.add_argument("--service-url", help="use an already running service instead of starting one")
+    parser.add_argument("--artemis-url", help="use an already running Artemis (or stub) instead of starting one")
+    # Stub options (ignored with --artemis-url)
+    parser.add_argument("--doors", type=int, default=500)
+    parser.add_argument("--visitors", type=int, default=2000)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    # "hang" is left out by default: it stalls a scenario for as long as the stub's --hang-seconds
+    parser.add_argument("--error-kinds", default="http,code")
+    parser.add_argument("--json", dest="json_path", help="also write the results as JSON to this file ('-' for stdout)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in scenarios if name not in SCENARIOS]
+    if unknown:
+        raise SystemExit(f"Unknown scenarios: {', '.join(unknown)}")
+    # With --json - stdout carries only the JSON report
+    out = sys.stderr if args.json_path == "-" else sys.stdout
+
+    processes = []
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            artemis_url = args.artemis_url
+            if not artemis_url:
+                port = free_port()
+                processes.append(start_stub(args, port))
+                artemis_url = f"http://127.0.0.1:{port}"
+
+            service_url = args.service_url
+            if not service_url:
+                port = free_port()
+                processes.append(start_service(args, port, artemis_url, workdir))
+                service_url = f"http://127.0.0.1:{port}"
+
+            login = httpx.post(f"{service_url}/token", data={"username": USERNAME, "password": PASSWORD})
+            login.raise_for_status()
+            token = login.json()["access_token"]
+
+            results = []
+            for scenario in scenarios:
+                print(f"running {scenario} for {args.duration:g}s at concurrency {args.concurrency} ...", file=out)
+                results.append(run_scenario(service_url, token, scenario, args))
+
+            print(file=out)
+            print_table(results, out)
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait(timeout=10)
+
+    report = {
+        "config": {
+            "duration_s": args.duration, "concurrency": args.concurrency, "processes": args.processes,
+            "workers": args.workers, "latency_ms": args.latency_ms, "jitter_ms": args.jitter_ms,
+            "error_rate": args.error_rate, "error_kinds": args.error_kinds, "doors": args.doors, "visitors": args.visitors,
+            "service_env": args.service_env,
+        },
+        "results": results,
+    }
+    if args.json_path == "-":
+        print(json.dumps(report, indent=2))
+    elif args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+if __name__ == "__main__":
+    main()
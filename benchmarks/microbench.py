@@ -0,0 +1,249 @@
+"""Microbenchmarks for the per-request hot paths: Artemis signing and JWT auth.
+
+Each case is timed with timeit: the loop count is calibrated to ~0.2 s, then
+the loop is repeated and the median and best ns/op are reported. Inputs are
+fixed (deterministic bodies, fixed keys), so runs are comparable across
+versions on the same machine. The sign/legacy cases keep the pre-SigningContext
+implementation as a fixed baseline, and the */uncached request and JWT cases
+show what the verified-token cache saves.
+
+Run from the project root:
+    python benchmarks/microbench.py                          # table
+    python benchmarks/microbench.py --json results.json      # also write JSON
+    python benchmarks/microbench.py --json - > results.json  # JSON on stdout, table on stderr
+    python benchmarks/microbench.py --baseline old.json      # compare, exit 1 on regressions
+    python benchmarks/microbench.py --filter sign            # only cases whose name contains "sign"
+"""
+
+import argparse
+import base64
+import contextlib
+import datetime
+import hashlib
+import hmac
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+# The app prints a startup banner; keep stdout clean for --json -
+with contextlib.redirect_stdout(sys.stderr):
+    from app import app
+from app.backend.config import settings
+from app.backend.services import auth_service, signature_service
+from app.backend.services.signature_service import SignatureService, SigningContext, serialize_body
+
+APP_KEY = "12345678"
+APP_SECRET = "benchmark_secret_0123"
+HOST = "https://127.0.0.1"
+API_PATH = "/artemis/api/visitor/v1/visitor/visitorInfo"
+DOOR_API_PATH = "/artemis/api/resource/v1/acsDoor/advance/acsDoorList"
+DOOR_PAYLOAD = {"pageNo": 1, "pageSize": 200}
+
+# Body sizes in serialized bytes (approximate): a page request up to a large bulk payload
+BODY_SIZES = (64, 1024, 16 * 1024, 256 * 1024)
+
+
+def make_body(size):
+    """A deterministic JSON body that serializes to roughly `size` bytes."""
+    body = {"pageNo": 1, "pageSize": 100}
+    filler = size - len(serialize_body(body))
+    if filler > 0:
+        body["visitorInfoList"] = ["x" * 54] * max(filler // 57, 1)
+    return body
+
+
+def legacy_generate_signature(method, api_path, body):
+    """The pre-SigningContext implementation, kept as a fixed baseline."""
+    body_str = json.dumps(body)
+    content_md5 = base64.b64encode(hashlib.md5(body_str.encode('utf-8')).digest()).decode('utf-8')
+
+    accept = "application/json"
+    content_type = "application/json;charset=UTF-8"
+    headers_to_sign = f"x-ca-key:{APP_KEY}\n"
+
+    string_to_sign = (
+        f"{method}\n"
+        f"{accept}\n"
+        f"{content_md5}\n"
+        f"{content_type}\n"
+        f"{headers_to_sign}"
+        f"{api_path}"
+    )
+
+    hmac_sha256 = hmac.new(APP_SECRET.encode('utf-8'), string_to_sign.encode('utf-8'), hashlib.sha256)
+    signature = base64.b64encode(hmac_sha256.digest()).decode('utf-8')
+    return {"Content-MD5": content_md5, "X-Ca-Key": APP_KEY, "X-Ca-Signature": signature}
+
+
+def time_case(fn, repeat, target_seconds=0.2):
+    """Returns (best ns/op, median ns/op, loops per repeat)."""
+    timer = timeit.Timer(fn)
+    loops, elapsed = timer.autorange()
+    if elapsed < target_seconds:
+        loops = max(int(loops * target_seconds / max(elapsed, 1e-9)), 1)
+    timings = [t / loops * 1e9 for t in timer.repeat(repeat=repeat, number=loops)]
+    return min(timings), statistics.median(timings), loops
+
+
+def signing_cases():
+    uncached = SigningContext(APP_KEY, APP_SECRET, HOST, max_cached_body=-1)
+    cached = SigningContext(APP_KEY, APP_SECRET, HOST)
+    cases = []
+    for size in BODY_SIZES:
+        body = make_body(size)
+        body_bytes = serialize_body(body)
+        label = f"{size // 1024}KiB" if size >= 1024 else f"{size}B"
+        cases.append((f"sign/uncached/{label}", lambda b=body: uncached.sign("POST", API_PATH, b)))
+        cases.append((f"sign/pre-serialized/{label}", lambda b=body_bytes: uncached.sign("POST", API_PATH, b)))
+        cases.append((f"serialize/{label}", lambda b=body: serialize_body(b)))
+        cases.append((f"content_md5/{label}", lambda b=body_bytes: uncached.content_md5(b)))
+
+    page_request = make_body(64)
+    cases.append(("sign/memoized/64B", lambda: cached.sign("POST", API_PATH, page_request)))
+
+    # Before/after SigningContext: the constant door payload, and a new body every call
+    counter = iter(range(10 ** 12))
+    cases.append(("sign/legacy/door", lambda: legacy_generate_signature("POST", DOOR_API_PATH, DOOR_PAYLOAD)))
+    cases.append(("sign/memoized/door", lambda: cached.sign("POST", DOOR_API_PATH, DOOR_PAYLOAD)))
+    cases.append(("sign/legacy/unique", lambda: legacy_generate_signature(
+        "POST", DOOR_API_PATH, {"pageNo": next(counter), "pageSize": 200})))
+    cases.append(("sign/uncached/unique", lambda: uncached.sign(
+        "POST", DOOR_API_PATH, {"pageNo": next(counter), "pageSize": 200})))
+
+    # The shared entry point every controller goes through (process-wide context)
+    signature_service.VMS_APP_KEY, signature_service.VMS_APP_SECRET = APP_KEY, APP_SECRET
+    signature_service._signing_context = None
+    cases.append(("generate_signature/64B", lambda: SignatureService.generate_signature("POST", API_PATH, page_request)))
+    return cases
+
+
+def auth_cases():
+    token = auth_service.create_access_token({"sub": "bench_kiosk"})
+    credentials_exception = HTTPException(status_code=401)
+
+    def decode_uncached():
+        auth_service.clear_token_cache()
+        return auth_service.verify_access_token(token, credentials_exception)
+
+    return [
+        ("jwt/encode", lambda: auth_service.create_access_token({"sub": "bench_kiosk"})),
+        ("jwt/decode", decode_uncached),
+        ("jwt/verify-cached", lambda: auth_service.verify_access_token(token, credentials_exception)),
+    ]
+
+
+def request_cases(client):
+    """The full FastAPI path of protected routes: middleware, OAuth2 header parsing, DI, auth, response.
+
+    The route never calls the VMS, so this is the service's own per-request cost
+    (plus the in-process TestClient's overhead, which is the same between versions).
+    """
+    token = auth_service.create_access_token({"sub": "bench_kiosk"})
+    headers = {"Authorization": f"Bearer {token}"}
+    protected_route = "/api/doors/door/cache/stats"
+
+    def protected_uncached():
+        # Every request pays the full JWT decode, as without the token cache
+        auth_service.clear_token_cache()
+        return client.get(protected_route, headers=headers)
+
+    return [
+        ("request/protected", lambda: client.get(protected_route, headers=headers)),
+        ("request/protected-uncached", protected_uncached),
+        ("request/unauthorized", lambda: client.get(protected_route)),
+    ]
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, timeout=10
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def compare(results, baseline_path, threshold, out=sys.stdout):
+    """Prints the change against a previous JSON run; returns the names that regressed by more than threshold."""
+    with open(baseline_path) as f:
+        baseline = {case["name"]: case for case in json.load(f)["results"]}
+
+    regressions = []
+    print(f"\nvs {baseline_path} (median ns/op, >{threshold:.0%} slower is flagged)", file=out)
+    for case in results:
+        old = baseline.get(case["name"])
+        if old is None:
+            continue
+        change = case["median_ns"] / old["median_ns"] - 1
+        flag = "  REGRESSION" if change > threshold else ""
+        if flag:
+            regressions.append(case["name"])
+        print(f"{case['name']:<32}{old['median_ns']:>14,.0f}{case['median_ns']:>14,.0f}{change:>+10.1%}{flag}", file=out)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=7, help="timed repeats per case")
+    parser.add_argument("--filter", default="", help="only run cases whose name contains this")
+    parser.add_argument("--json", dest="json_path", help="write results as JSON to this file ('-' for stdout)")
+    parser.add_argument("--baseline", help="JSON results from a previous run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="regression threshold for --baseline")
+    args = parser.parse_args(argv)
+    # With --json - stdout carries only the JSON report
+    out = sys.stderr if args.json_path == "-" else sys.stdout
+
+    with TestClient(app) as client:
+        cases = signing_cases() + auth_cases() + request_cases(client)
+        cases = [(name, fn) for name, fn in cases if args.filter in name]
+
+        results = []
+        print(f"{'case':<32}{'best ns/op':>14}{'median ns/op':>14}{'ops/s':>14}", file=out)
+        for name, fn in cases:
+            best, median, loops = time_case(fn, args.repeat)
+            results.append({
+                "name": name,
+                "best_ns": round(best, 1),
+                "median_ns": round(median, 1),
+                "ops_per_sec": round(1e9 / median, 1),
+                "loops": loops,
+                "repeat": args.repeat,
+            })
+            print(f"{name:<32}{best:>14,.0f}{median:>14,.0f}{1e9 / median:>14,.0f}", file=out)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "serializer": settings.ARTEMIS_JSON_SERIALIZER,
+            "orjson": signature_service.orjson is not None,
+            "token_cache_size": settings.TOKEN_CACHE_SIZE,
+        },
+        "results": results,
+    }
+    if args.json_path == "-":
+        print(json.dumps(report, indent=2))
+    elif args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline and compare(results, args.baseline, args.threshold, out):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
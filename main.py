@@ -1,6 +1,8 @@
 import sys
 import os
 import logging
+import importlib.util
+import multiprocessing
 import uvicorn
 import json
 
@@ -13,29 +15,91 @@ else:
     # If running as a script (python main.py)
     BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
-# Setup logging
 log_file = os.path.join(BASE_DIR, 'service_debug.log')
-logging.basicConfig(filename=log_file, level=logging.DEBUG, 
-                    format='%(asctime)s %(levelname)s: %(message)s')
+config_path = os.path.join(BASE_DIR, 'server_config.json')
 
-def get_protocol_config():
-    """Reads server_config.json from the correct folder"""
-    config_path = os.path.join(BASE_DIR, 'server_config.json')
+def load_server_config():
+    """Reads server_config.json from the correct folder. Returns (config, error)."""
     try:
         if not os.path.exists(config_path):
-            logging.warning(f"Config file not found at {config_path}. Defaulting to HTTP.")
-            return "http"
-            
+            return {}, f"Config file not found at {config_path}."
         with open(config_path, 'r') as f:
-            data = json.load(f)
-            mode = data.get("protocol", "http").lower()
-            logging.info(f"Read config: {mode}")
-            return mode
+            return json.load(f), None
     except Exception as e:
-        logging.warning(f"Config read failed ({e}), defaulting to HTTP.")
-        return "http"
+        return {}, f"Config read failed ({e})."
+
+def get_logging_options(config):
+    """Logging settings from server_config.json ("log_level", "log_max_bytes", ...)."""
+    return {
+        "level": config.get("log_level", "INFO"),
+        "max_bytes": int(config.get("log_max_bytes", 10 * 1024 * 1024)),
+        "backup_count": int(config.get("log_backup_count", 5)),
+        "rotate_when": config.get("log_rotate_when"), # e.g. "midnight" for daily files instead of size
+    }
+
+def setup_service_logging(config):
+    """Queued, rotating file logging. Returns the options actually applied."""
+    from app.backend.services.logging_service import setup_logging
+    try:
+        options = get_logging_options(config)
+        setup_logging(log_file, **options)
+    except ValueError as e:
+        options = {"level": "INFO"}
+        setup_logging(log_file, **options)
+        logging.warning(f"Invalid logging config ({e}), using INFO.")
+    return options
+
+def _int_option(config, key, default, minimum=None):
+    try:
+        value = int(config.get(key, default))
+    except (TypeError, ValueError):
+        logging.warning(f"Invalid '{key}' in server_config.json, using {default}.")
+        value = default
+    return max(value, minimum) if minimum is not None else value
+
+def _impl_option(config, key, default, optional_modules):
+    """Validates a loop/http implementation name; falls back to "auto" if its module is missing."""
+    name = str(config.get(key, default)).lower()
+    if name not in ("auto",) + tuple(optional_modules.keys()):
+        logging.warning(f"Unknown '{key}' value '{name}' in server_config.json, using auto.")
+        return "auto"
+    module = optional_modules.get(name)
+    if module and importlib.util.find_spec(module) is None:
+        logging.warning(f"'{key}': {name} requested but not installed, using auto.")
+        return "auto"
+    return name
+
+def get_server_options(config):
+    """Uvicorn tuning from server_config.json. All keys are optional:
+    {"port": 8000, "workers": 1, "backlog": 2048, "timeout_keep_alive": 5,
+     "loop": "auto|asyncio|uvloop", "http": "auto|h11|httptools"}
+    """
+    return {
+        "host": str(config.get("host", "0.0.0.0")),
+        "port": _int_option(config, "port", 8000, minimum=1),
+        "workers": _int_option(config, "workers", 1, minimum=1),
+        "backlog": _int_option(config, "backlog", 2048, minimum=1),
+        "timeout_keep_alive": _int_option(config, "timeout_keep_alive", 5, minimum=1),
+        "loop": _impl_option(config, "loop", "auto", {"asyncio": None, "uvloop": "uvloop"}),
+        "http": _impl_option(config, "http", "auto", {"h11": None, "httptools": "httptools"}),
+        # Logging is ours (queued + rotating); keep uvicorn from replacing it
+        "log_config": None,
+    }
+
+def get_protocol_config(config):
+    """Returns "http" or "https" from the loaded server config."""
+    mode = str(config.get("protocol", "http")).lower()
+    logging.info(f"Read config: {mode}")
+    return mode
 
 if __name__ == '__main__':
+    # Required for multi-worker mode in the frozen EXE (workers are spawned processes)
+    multiprocessing.freeze_support()
+
+    server_config, config_error = load_server_config()
+    logging_options = setup_service_logging(server_config)
+    if config_error:
+        logging.warning(f"{config_error} Defaulting to HTTP.")
     logging.info(f"Service starting from: {BASE_DIR}")
     
     # 1. Load the App
@@ -50,10 +114,25 @@ if __name__ == '__main__':
             sys.exit(1)
 
     # 2. Check Protocol
-    protocol = get_protocol_config()
+    protocol = get_protocol_config(server_config)
     logging.info(f"Starting VMS Controller in {protocol.upper()} mode...")
 
-    # 3. Start Uvicorn
+    # 3. Server tuning
+    server_options = get_server_options(server_config)
+    app_target = app
+    if server_options["workers"] > 1:
+        # Uvicorn needs an import string to start worker processes; each worker builds
+        # its own caches and connection pool in the app lifespan
+        # Workers send their log records here, so there is still one rotating service_debug.log
+        from app.backend.services.logging_service import WORKER_LOG_ENV, start_worker_log_receiver
+        os.environ[WORKER_LOG_ENV] = json.dumps({
+            "log_port": start_worker_log_receiver(),
+            "level": logging_options["level"],
+        })
+        app_target = "app:app"
+    logging.info(f"Server options: {server_options}")
+
+    # 4. Start Uvicorn
     try:
         if protocol == "https":
             # Look for certs in the BASE_DIR (next to the exe)
@@ -62,14 +141,14 @@ if __name__ == '__main__':
             
             if not os.path.exists(cert_file) or not os.path.exists(key_file):
                 logging.error(f"CRITICAL: HTTPS selected but keys not found at: {cert_file}")
-                # Fallback to HTTP but DISABLE log_config to prevent crash
-                uvicorn.run(app, host="0.0.0.0", port=8000, log_config=None)
+                # Fallback to HTTP
+                uvicorn.run(app_target, **server_options)
             else:
-                # HTTPS Mode with log_config disabled
-                uvicorn.run(app, host="0.0.0.0", port=8000, ssl_certfile=cert_file, ssl_keyfile=key_file, log_config=None)
+                # HTTPS Mode
+                uvicorn.run(app_target, ssl_certfile=cert_file, ssl_keyfile=key_file, **server_options)
         else:
-            # HTTP Mode with log_config disabled
-            uvicorn.run(app, host="0.0.0.0", port=8000, log_config=None)
+            # HTTP Mode
+            uvicorn.run(app_target, **server_options)
             
     except Exception as e:
-        logging.error(f"Server crashed: {e}")
\ No newline at end of file
+        logging.error(f"Server crashed: {e}")
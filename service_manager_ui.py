@@ -437,9 +437,18 @@ class VMSControllerUI(ctk.CTk):
     # --- LOGIC & THREADING ---
 
     def save_protocol_only(self, val):
+        # Keep the other service settings (log level, etc.) already in the file
+        config = {}
+        if os.path.exists(CONFIG_FILE):
+            try:
+                with open(CONFIG_FILE, 'r') as f:
+                    config = json.load(f)
+            except Exception:
+                config = {}
+        config["protocol"] = val.lower()
         with open(CONFIG_FILE, 'w') as f:
-            json.dump({"protocol": val.lower()}, f)
-        self.ip_link.configure(text=f"{val.lower()}://127.0.0.1:8000")
+            json.dump(config, f)
+        self.ip_link.configure(text=f"{val.lower()}://127.0.0.1:{config.get('port', 8000)}")
 
     def monitor_service(self):
         """Background Loop."""
@@ -505,8 +514,8 @@ class VMSControllerUI(ctk.CTk):
                 data = json.load(f); self.entry_key.insert(0, data.get("partner_key", "")); self.entry_secret.insert(0, data.get("partner_secret", ""))
         if os.path.exists(CONFIG_FILE):
             with open(CONFIG_FILE, 'r') as f:
-                proto = json.load(f).get("protocol", "http"); self.protocol_var.set(proto.upper())
-                self.ip_link.configure(text=f"{proto.lower()}://127.0.0.1:8000")
+                config = json.load(f); proto = config.get("protocol", "http"); self.protocol_var.set(proto.upper())
+                self.ip_link.configure(text=f"{proto.lower()}://127.0.0.1:{config.get('port', 8000)}")
 
     def save_all_data(self):
         with open(KEYS_FILE, "w") as f: json.dump({"partner_key": self.entry_key.get(), "partner_secret": self.entry_secret.get()}, f, indent=4)